@@ -5,9 +5,18 @@ Author: Botiwa
 Modern, fluent design with glassmorphism effects and smooth animations
 """
 
-import customtkinter as ctk
-import tkinter as tk
-from tkinter import messagebox, filedialog
+# Headless --worker runs need neither customtkinter nor a display
+try:
+    import customtkinter as ctk
+except ImportError:
+    ctk = None
+
+try:
+    import tkinter as tk
+    from tkinter import messagebox, filedialog
+except ImportError:
+    tk = messagebox = filedialog = None
+
 import subprocess
 import os
 import sys
@@ -15,83 +24,2759 @@ import threading
 from pathlib import Path
 import webbrowser
 import json
+import math
+import errno
+import tempfile
 import re
+import csv
+import io
+import shutil
 import time
 from concurrent.futures import ThreadPoolExecutor
 import queue
+import heapq
+import itertools
+import signal
+import hashlib
+import base64
+import urllib.request
+import argparse
+import traceback
+import cProfile
+import pstats
+import tracemalloc
+import sqlite3
+import socket
+import uuid
+import gzip
+from array import array
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+import weakref
+from concurrent.futures import Future
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    from mutagen.oggopus import OggOpus
+    from mutagen.flac import Picture
+except ImportError:
+    OggOpus = None
+
+class ModernTheme:
+    """Modern fluent design theme with glassmorphism effects"""
+    
+    def __init__(self):
+        # Modern color palette - Deep blues with accent colors
+        self.colors = {
+            # Backgrounds - Modern dark theme
+            'bg_primary': '#0A0A0B',           # Deep black
+            'bg_secondary': '#111114',         # Dark gray
+            'bg_tertiary': '#1A1A1E',          # Medium gray
+            'bg_card': '#1E1E23',              # Card background
+            'bg_surface': '#252529',           # Surface color
+            'bg_glass': '#1A1A1E',             # Glass effect
+            
+            # Modern accent colors
+            'accent_primary': '#007AFF',       # iOS Blue
+            'accent_secondary': '#5856D6',     # Purple
+            'accent_success': '#34C759',       # Green
+            'accent_warning': '#FF9500',       # Orange
+            'accent_error': '#FF3B30',         # Red
+            'accent_pink': '#FF2D92',          # Pink
+            'accent_teal': '#5AC8FA',          # Teal
+            'accent_indigo': '#5856D6',        # Indigo
+            
+            # Text colors
+            'text_primary': '#FFFFFF',         # Pure white
+            'text_secondary': '#EBEBF5',       # Light gray
+            'text_tertiary': '#8E8E93',        # Medium gray
+            'text_quaternary': '#48484A',      # Dark gray
+            
+            # Interactive elements
+            'border': '#38383A',               # Border color
+            'border_active': '#007AFF',        # Active border
+            'hover': '#2C2C2E',                # Hover state
+            'pressed': '#1C1C1E',              # Pressed state
+            
+            # Gradients (for future use)
+            'gradient_start': '#007AFF',
+            'gradient_end': '#5856D6',
+        }
+
+class AnimationManager:
+    """Handle smooth animations and transitions"""
+    
+    def __init__(self):
+        self.animations = {}
+        
+    def fade_in(self, widget, duration=300):
+        """Fade in animation"""
+        # Placeholder for fade animation
+        pass
+        
+    def slide_in(self, widget, direction="left", duration=300):
+        """Slide in animation"""
+        # Placeholder for slide animation
+        pass
+
+VIDEO_ID_PATTERN = re.compile(r'(?:[?&]v=|youtu\.be/|/embed/|/shorts/)([A-Za-z0-9_-]{11})')
+
+YOUTUBE_URL_PATTERN = re.compile(
+    r'(?:^|//|\.)(?:youtube\.com/(?:watch\?|embed/|shorts/)|music\.youtube\.com/watch\?|youtu\.be/)'
+)
+URL_TOKEN_SEPARATORS = re.compile(r'[\s,;"<>]+')
+
+def extract_video_id(url):
+    """Return the 11 character video id of a YouTube URL, or None"""
+    match = VIDEO_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+def canonical_song_url(video_id):
+    """Single watch URL used for a video id whatever form it was pasted in"""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def song_id_from_url(url):
+    """Video id of a YouTube song URL, or None when it is not one"""
+    if not YOUTUBE_URL_PATTERN.search(url):
+        return None
+    return extract_video_id(url)
+
+def split_url_text(text):
+    """Split pasted text or a plain text file into URL candidates"""
+    return [token for token in URL_TOKEN_SEPARATORS.split(text) if token]
+
+def split_url_csv(text):
+    """URL candidates of a CSV file, one per row, skipping a header row"""
+    candidates = []
+    for row_number, row in enumerate(csv.reader(io.StringIO(text))):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if not cells:
+            continue
+        url = next((cell for cell in cells if song_id_from_url(cell)), None)
+        if url is None and row_number == 0:
+            continue
+        candidates.append(url or cells[0])
+    return candidates
+
+def dedupe_song_urls(candidates, known_ids):
+    """Canonicalize candidates in one pass, returning (accepted, duplicates, invalid)
+    
+    accepted holds (video_id, canonical_url) pairs in input order; known_ids is
+    updated with every accepted id.
+    """
+    accepted = []
+    duplicates = invalid = 0
+    for candidate in candidates:
+        video_id = song_id_from_url(candidate)
+        if video_id is None:
+            invalid += 1
+        elif video_id in known_ids:
+            duplicates += 1
+        else:
+            known_ids.add(video_id)
+            accepted.append((video_id, canonical_song_url(video_id)))
+    return accepted, duplicates, invalid
+
+# Per-user caches shared by every download location
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".youtube_music_downloader")
+
+STREAM_EXPIRE_PATTERN = re.compile(r'[?&/]expire[=/](\d+)')
+
+class InfoJsonCache:
+    """yt-dlp info JSON per video id, reused until its stream URLs expire"""
+    
+    # Stream URLs are refused a little before their expire stamp
+    SAFETY_MARGIN = 600
+    DEFAULT_LIFETIME = 6 * 3600
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        self.expiry = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.expiry = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def path(self, video_id):
+        return os.path.join(self.cache_dir, f"{video_id}.info.json")
+    
+    def output_template(self):
+        """yt-dlp --output value that writes the info JSON into the cache"""
+        return "infojson:" + os.path.join(self.cache_dir, "%(id)s")
+    
+    def _save(self):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.expiry, f)
+        os.replace(temp_path, self.index_path)
+    
+    def _read_expiry(self, video_id):
+        """Earliest expire stamp among the stream URLs of a cached info JSON"""
+        path = self.path(video_id)
+        with open(path, encoding="utf-8") as f:
+            info = json.load(f)
+        urls = [info.get('url')] + [fmt.get('url') for fmt in info.get('requested_formats') or []]
+        stamps = [int(match.group(1)) for match in (STREAM_EXPIRE_PATTERN.search(u) for u in urls if u) if match]
+        return min(stamps) if stamps else os.path.getmtime(path) + self.DEFAULT_LIFETIME
+    
+    def fresh(self, video_id):
+        """Path of a usable info JSON for video_id, or None"""
+        if not os.path.isfile(self.path(video_id)):
+            return None
+        with self.lock:
+            expires = self.expiry.get(video_id)
+            if expires is None:
+                # Written by yt-dlp since the last lookup
+                try:
+                    expires = self.expiry[video_id] = self._read_expiry(video_id)
+                except (OSError, ValueError):
+                    return None
+                self._save()
+            if expires - self.SAFETY_MARGIN <= time.time():
+                # Forget the stale stamp so the info JSON the next full
+                # extraction writes is read afresh on the following lookup
+                self.expiry.pop(video_id, None)
+                self._save()
+                return None
+        return self.path(video_id)
+    
+    def invalidate(self, video_id):
+        with self.lock:
+            self.expiry.pop(video_id, None)
+            self._save()
+        try:
+            os.remove(self.path(video_id))
+        except OSError:
+            pass
+    
+    def prune(self):
+        """Delete expired entries; returns how many were removed"""
+        now = time.time()
+        with self.lock:
+            expired = [video_id for video_id, expires in self.expiry.items() if expires - self.SAFETY_MARGIN <= now]
+        for video_id in expired:
+            self.invalidate(video_id)
+        return len(expired)
+
+CONFIG_PATH = os.path.join(APP_DATA_DIR, "config.json")
+
+def load_config():
+    """Saved calibration results and manual overrides"""
+    try:
+        with open(CONFIG_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_config(config):
+    os.makedirs(APP_DATA_DIR, exist_ok=True)
+    temp_path = CONFIG_PATH + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(temp_path, CONFIG_PATH)
+
+def tuned_setting(config, key, default):
+    """Manual override if set, else the calibrated value, else default"""
+    return config.get('overrides', {}).get(key, config.get('calibration', {}).get(key, default))
+
+class HardwareCalibrator:
+    """Measures transcode, disk and network speed and derives worker counts"""
+    
+    # Large enough that a few seconds of reading measures throughput, not latency;
+    # override with 'network_probe_url' in config.json (or point it at a local server)
+    NETWORK_PROBE_URL = "https://speed.cloudflare.com/__down?bytes=100000000"
+    NETWORK_STREAMS = 4
+    # The probe is a generic CDN file, while downloads are held back by YouTube's
+    # per-stream speed and yt-dlp/FFmpeg start-up, so it never recommends fewer
+    DEFAULT_DOWNLOAD_WORKERS = 4
+    MAX_WORKERS = 8
+    
+    def __init__(self, disk_path, probe_url=None):
+        self.disk_path = disk_path
+        self.probe_url = probe_url or self.NETWORK_PROBE_URL
+        self.cores = os.cpu_count() or 2
+    
+    @staticmethod
+    def _transcode_cmd(seconds):
+        return [
+            "ffmpeg", "-hide_banner", "-nostats", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:a", "libopus", "-b:a", f"{ESTIMATED_BITRATE_KBPS}k", "-f", "null", "-"
+        ]
+    
+    def measure_transcode(self, seconds=30):
+        """Audio seconds encoded per wall second, on one core and on all cores at once"""
+        start = time.perf_counter()
+        subprocess.run(self._transcode_cmd(seconds), capture_output=True, check=True, timeout=120)
+        single = seconds / (time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        processes = []
+        try:
+            for _ in range(self.cores):
+                processes.append(subprocess.Popen(self._transcode_cmd(seconds), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            for process in processes:
+                process.wait(timeout=240)
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+        parallel = self.cores * seconds / (time.perf_counter() - start)
+        return {'transcode_speed': round(single, 1), 'transcode_parallel_speed': round(parallel, 1)}
+    
+    def measure_disk(self, size=64 * 1024 * 1024):
+        """Sequential write speed of the download drive in MB/s"""
+        chunk = os.urandom(1024 * 1024)
+        fd, path = tempfile.mkstemp(prefix="calibrate-", dir=self.disk_path)
+        try:
+            start = time.perf_counter()
+            with os.fdopen(fd, "wb") as f:
+                for _ in range(size // len(chunk)):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            elapsed = time.perf_counter() - start
+        finally:
+            os.remove(path)
+        return {'disk_mbps': round(size / elapsed / 1e6, 1)}
+    
+    def _stream_probe(self, deadline):
+        """Bytes read from the probe URL until the deadline, reopening it if it ends early"""
+        received = 0
+        while time.perf_counter() < deadline:
+            with urllib.request.urlopen(self.probe_url, timeout=10) as response:
+                while time.perf_counter() < deadline:
+                    chunk = response.read(64 * 1024)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+        return received
+    
+    def measure_network(self, duration=4.0, streams=None):
+        """Throughput in Mbit/s of one download and of several downloads at once"""
+        streams = streams or self.NETWORK_STREAMS
+        start = time.perf_counter()
+        received = self._stream_probe(start + duration)
+        single = received * 8 / (time.perf_counter() - start) / 1e6
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=streams) as pool:
+            received = sum(pool.map(self._stream_probe, [start + duration] * streams))
+        parallel = received * 8 / (time.perf_counter() - start) / 1e6
+        return {'stream_mbps': round(single, 1), 'network_mbps': round(parallel, 1), 'network_streams': streams}
+    
+    def run(self, log=None):
+        """Run every probe that works here and return measurements plus recommendations"""
+        results = {'cores': self.cores}
+        for name, probe in (("transcode", self.measure_transcode), ("disk", self.measure_disk), ("network", self.measure_network)):
+            try:
+                results.update(probe())
+            except Exception as e:
+                if log:
+                    log(f"⚠️ {name.title()} probe failed: {str(e)[:80]}")
+        results.update(self.recommend(results))
+        results['calibrated_at'] = time.time()
+        return results
+    
+    @classmethod
+    def recommend(cls, results):
+        """Network-stage and CPU-stage concurrency from measurements"""
+        cores = results.get('cores') or os.cpu_count() or 2
+        single = results.get('stream_mbps')
+        network = results.get('network_mbps')
+        streams = results.get('network_streams') or cls.NETWORK_STREAMS
+        if single and network:
+            # Parallel downloads that actually add throughput; if every probe stream still
+            # got full speed the link is not saturated yet, so allow more than were tried
+            gain = network / single
+            download_workers = cls.MAX_WORKERS if gain >= streams * 0.9 else round(gain)
+        else:
+            download_workers = cls.DEFAULT_DOWNLOAD_WORKERS
+        download_workers = max(download_workers, cls.DEFAULT_DOWNLOAD_WORKERS)
+        # Each download ends in an ffmpeg pass, do not queue more than the CPU keeps up with
+        download_workers = max(1, min(download_workers, cores * 2, cls.MAX_WORKERS))
+        
+        single = results.get('transcode_speed')
+        parallel = results.get('transcode_parallel_speed')
+        # Cores that actually add throughput (SMT siblings and throttling count less)
+        cpu_workers = max(1, min(cores, round(parallel / single))) if single and parallel else cores
+        
+        disk = results.get('disk_mbps')
+        copy_workers = 2 if disk and disk >= 100 else 1
+        return {'download_workers': download_workers, 'cpu_workers': cpu_workers, 'copy_workers': copy_workers}
+
+class MusicLibrary:
+    """Content-addressed track store with hardlinked folder views"""
+    
+    LIBRARY_DIR = "YouTube_Music_Library"
+    AUDIO_EXT = "opus"
+    
+    def __init__(self, base_dir):
+        self.root = os.path.join(base_dir, self.LIBRARY_DIR)
+        self.tracks_dir = os.path.join(self.root, "tracks")
+        os.makedirs(self.tracks_dir, exist_ok=True)
+    
+    def default_staging_dir(self):
+        """Staging folder on the library's own filesystem, where moves are atomic"""
+        return os.path.join(self.root, ".staging")
+    
+    def track_path(self, video_id):
+        """Path of the stored audio file for a video id"""
+        # Two character shards keep directories small on big libraries
+        return os.path.join(self.tracks_dir, video_id[:2], f"{video_id}.{self.AUDIO_EXT}")
+    
+    def sidecar_path(self, video_id):
+        """Path of the metadata sidecar for a video id"""
+        return os.path.join(self.tracks_dir, video_id[:2], f"{video_id}.json")
+    
+    def get_track(self, video_id):
+        """Return stored track metadata, or None if the id is not in the library"""
+        if not os.path.isfile(self.track_path(video_id)):
+            return None
+        
+        try:
+            with open(self.sidecar_path(video_id), encoding="utf-8") as f:
+                track = json.load(f)
+        except (OSError, ValueError):
+            track = {'id': video_id, 'title': video_id}
+        track['path'] = self.track_path(video_id)
+        return track
+    
+    def add_track(self, video_id, title, duration=None, codec=None, thumbnail=None, artist=None, album=None):
+        """Record metadata for a freshly downloaded track"""
+        track = {
+            'id': video_id,
+            'title': title,
+            'duration': duration,
+            'codec': codec or self.AUDIO_EXT,
+            'thumbnail': thumbnail,
+            'artist': artist,
+            'album': album
+        }
+        self.save_track(track)
+        track['path'] = self.track_path(video_id)
+        return track
+    
+    def save_track(self, track):
+        """Write a track's metadata sidecar"""
+        video_id = track['id']
+        os.makedirs(os.path.dirname(self.sidecar_path(video_id)), exist_ok=True)
+        with open(self.sidecar_path(video_id), "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in track.items() if k != 'path'}, f, ensure_ascii=False)
+        self.touched(video_id)
+    
+    def touched(self, video_id):
+        """Note an in-place change to a stored track or its sidecar, which leaves the shard mtime alone"""
+        LibraryIndex.track_changed(self.root, video_id)
+    
+    @staticmethod
+    def safe_filename(name):
+        """Strip characters that are not allowed in file names"""
+        name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name).strip(' .')
+        return name[:150] or "untitled"
+    
+    def view_filename(self, name):
+        """File name used for a track inside a folder view"""
+        return f"{self.safe_filename(name)}.{self.AUDIO_EXT}"
+    
+    def link_view(self, video_id, view_dir, name):
+        """Expose a stored track in a folder view, preferring hardlinks"""
+        source = self.track_path(video_id)
+        os.makedirs(view_dir, exist_ok=True)
+        target = os.path.join(view_dir, self.view_filename(name))
+        
+        if os.path.lexists(target):
+            try:
+                if os.path.samefile(source, target):
+                    return target
+            except OSError:
+                pass
+            os.remove(target)
+        
+        try:
+            os.link(source, target)
+        except OSError:
+            # Hardlinks fail across filesystems and on some network shares
+            try:
+                os.symlink(os.path.abspath(source), target)
+            except OSError:
+                shutil.copy2(source, target)
+        return target
+    
+    def refresh_view(self, video_id, target):
+        """Re-copy a view that is a copy, not a link, once the stored track changed in place; True if copied"""
+        source = self.track_path(video_id)
+        if not os.path.isfile(target) or os.path.samefile(source, target):
+            return False
+        source_stat = os.stat(source)
+        target_stat = os.stat(target)
+        # copy2 keeps the mtime, so any in-place write since shows up here
+        if (source_stat.st_size, source_stat.st_mtime_ns) == (target_stat.st_size, target_stat.st_mtime_ns):
+            return False
+        temp_path = target + ".part"
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+        return True
+
+class VerificationError(Exception):
+    """A downloaded file failed its integrity check"""
+
+class TrackVerifier:
+    """Integrity checks of finished downloads in a bounded pool of ffprobe/ffmpeg children"""
+    
+    EXPECTED_CODEC = "opus"
+    
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.available = True
+    
+    def submit(self, path, expected_duration=None):
+        """Future that raises VerificationError when the file is broken"""
+        return self.executor.submit(self._verify, path, expected_duration)
+    
+    @staticmethod
+    def tolerance(expected):
+        # Container durations drift a little from the page metadata
+        return max(2.0, expected * 0.02)
+    
+    def _verify(self, path, expected_duration):
+        if not self.available:
+            return None
+        try:
+            probe = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "stream=codec_type,codec_name:format=duration",
+                 "-of", "json", path],
+                capture_output=True, text=True, timeout=60
+            )
+        except FileNotFoundError:
+            # Without ffprobe there is nothing to check against
+            self.available = False
+            return None
+        if probe.returncode != 0:
+            raise VerificationError(f"unreadable file ({probe.stderr.strip()[:80]})")
+        
+        info = json.loads(probe.stdout or "{}")
+        audio = [s for s in info.get('streams', []) if s.get('codec_type') == 'audio']
+        if len(audio) != 1:
+            raise VerificationError(f"{len(audio)} audio streams")
+        if audio[0].get('codec_name') != self.EXPECTED_CODEC:
+            raise VerificationError(f"codec {audio[0].get('codec_name')}, expected {self.EXPECTED_CODEC}")
+        
+        try:
+            duration = float(info.get('format', {}).get('duration'))
+        except (TypeError, ValueError):
+            raise VerificationError("unknown duration")
+        if expected_duration and abs(duration - float(expected_duration)) > self.tolerance(float(expected_duration)):
+            raise VerificationError(f"{duration:.0f}s long, expected {float(expected_duration):.0f}s")
+        
+        # Decode everything so corrupt pages in the middle are caught too
+        decode = subprocess.run(
+            ["ffmpeg", "-v", "error", "-xerror", "-i", path, "-f", "null", "-"],
+            capture_output=True, text=True, timeout=300
+        )
+        if decode.returncode != 0:
+            raise VerificationError(f"decode error ({decode.stderr.strip()[:80]})")
+        return duration
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+class StagingCopier:
+    """Moves finished files from staging into place, copying across filesystems a few at a time"""
+    
+    CHUNK_SIZE = 4 * 1024 * 1024
+    
+    def __init__(self, max_copies=1):
+        # One copy at a time keeps writes to a slow share sequential
+        self.slots = threading.BoundedSemaphore(max_copies)
+    
+    def move(self, source, target):
+        """Atomically place source at target; the target never exists half-written"""
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(source, target)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        
+        temp_path = target + ".part"
+        with self.slots:
+            try:
+                with open(source, "rb") as src, open(temp_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, self.CHUNK_SIZE)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.replace(temp_path, target)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        os.remove(source)
+
+class LibraryIndex:
+    """Persistent index of stored tracks, rescanned per shard directory mtime"""
+    
+    # Open indexes by library root, so in-place writes through any MusicLibrary reach them
+    open_indexes = weakref.WeakValueDictionary()
+    
+    def __init__(self, library):
+        self.library = library
+        self.path = os.path.join(library.root, "index.json")
+        self.lock = threading.Lock()
+        self.shards = {}
+        self.by_id = {}
+        self.dirty = False
+        self._load()
+        LibraryIndex.open_indexes[library.root] = self
+    
+    @classmethod
+    def track_changed(cls, root, video_id):
+        index = cls.open_indexes.get(root)
+        if index is not None:
+            index.update(video_id)
+    
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.shards = json.load(f).get('shards', {})
+        except (OSError, ValueError):
+            self.shards = {}
+        self.by_id = {
+            video_id: track
+            for shard in self.shards.values()
+            for video_id, track in shard['tracks'].items()
+        }
+    
+    def _save(self):
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({'shards': self.shards}, f, ensure_ascii=False)
+        os.replace(self.path + ".tmp", self.path)
+    
+    def _read_track(self, video_id, path, stat):
+        try:
+            with open(self.library.sidecar_path(video_id), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        return {
+            'path': path,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'duration': meta.get('duration'),
+            'codec': meta.get('codec') or self.library.AUDIO_EXT,
+            'title': meta.get('title') or video_id
+        }
+    
+    def _scan_shard(self, name, shard_dir):
+        """Read every stored track of one shard directory"""
+        suffix = f".{self.library.AUDIO_EXT}"
+        tracks = {}
+        for entry in os.scandir(shard_dir):
+            video_id = entry.name[:-len(suffix)]
+            # Skip .part files and intermediate formats left by yt-dlp
+            if not entry.name.endswith(suffix) or '.' in video_id:
+                continue
+            tracks[video_id] = self._read_track(video_id, entry.path, entry.stat())
+        return tracks
+    
+    def update(self, video_id):
+        """Re-read one track after an in-place write; saved with the next refresh"""
+        with self.lock:
+            shard = self.shards.get(video_id[:2])
+            if shard is None:
+                # Not scanned yet, the next refresh reads it whole
+                return
+            path = self.library.track_path(video_id)
+            try:
+                track = self._read_track(video_id, path, os.stat(path))
+            except OSError:
+                shard['tracks'].pop(video_id, None)
+                self.by_id.pop(video_id, None)
+            else:
+                shard['tracks'][video_id] = track
+                self.by_id[video_id] = track
+            self.dirty = True
+    
+    def refresh(self):
+        """Rescan only the shard directories whose mtime changed since the last refresh"""
+        with self.lock:
+            changed = False
+            seen = set()
+            for entry in os.scandir(self.library.tracks_dir):
+                if not entry.is_dir():
+                    continue
+                seen.add(entry.name)
+                mtime = entry.stat().st_mtime_ns
+                shard = self.shards.get(entry.name)
+                if shard and shard['mtime'] == mtime:
+                    continue
+                
+                for video_id in (shard or {}).get('tracks', {}):
+                    self.by_id.pop(video_id, None)
+                tracks = self._scan_shard(entry.name, entry.path)
+                self.shards[entry.name] = {'mtime': mtime, 'tracks': tracks}
+                self.by_id.update(tracks)
+                changed = True
+            
+            for name in set(self.shards) - seen:
+                for video_id in self.shards.pop(name)['tracks']:
+                    self.by_id.pop(video_id, None)
+                changed = True
+            
+            if changed or self.dirty:
+                self._save()
+                self.dirty = False
+            return changed
+    
+    def get(self, video_id):
+        """Indexed metadata for a video id, or None"""
+        return self.by_id.get(video_id)
+    
+    def has(self, video_id):
+        return video_id in self.by_id
+    
+    def count_present(self, video_ids):
+        """How many of the given ids are already in the library"""
+        return sum(1 for video_id in video_ids if video_id in self.by_id)
+
+PLAYLIST_ID_PATTERN = re.compile(r'[?&]list=([A-Za-z0-9_-]+)')
+
+def cover_art_url(track):
+    """Thumbnail URL used as cover art for a track"""
+    return track.get('thumbnail') or f"https://i.ytimg.com/vi/{track['id']}/hqdefault.jpg"
+
+def thumbnail_url(video_id):
+    """Small (320x180) thumbnail URL for a song row"""
+    return f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"
+
+class CoverArtCache:
+    """Square cover images on disk, keyed by thumbnail URL hash and evicted LRU by size"""
+    
+    ART_SIZE = 600
+    
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024, workers=6, art_size=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.art_size = art_size or self.ART_SIZE
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # file name -> size, least recently used first
+        self.total_bytes = 0
+        self.inflight = {}
+        self.pins = {}  # file name -> callers between fetch(pin=True) and release
+        self.hits = 0
+        self.fetched = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+    
+    def _load(self):
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".jpg") and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+    
+    @staticmethod
+    def key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".jpg"
+    
+    def path(self, url):
+        return os.path.join(self.cache_dir, self.key(url))
+    
+    def fetch(self, url, pin=False):
+        """Future for the cached image path of url; one download per URL however many callers
+        
+        With pin=True the file is kept from eviction until release(url).
+        """
+        name = self.key(url)
+        path = os.path.join(self.cache_dir, name)
+        with self.lock:
+            if pin:
+                self.pins[name] = self.pins.get(name, 0) + 1
+            if name in self.entries:
+                try:
+                    # The mtime is the LRU order _load restores on the next start
+                    os.utime(path)
+                except OSError:
+                    self.total_bytes -= self.entries.pop(name)
+                else:
+                    self.entries.move_to_end(name)
+                    self.hits += 1
+                    future = Future()
+                    future.set_result(path)
+                    return future
+            future = self.inflight.get(url)
+            if future is None:
+                future = self.executor.submit(self._download, url, name)
+                self.inflight[url] = future
+            return future
+    
+    def _download(self, url, name):
+        try:
+            with urllib.request.urlopen(url, timeout=20) as response:
+                data = response.read()
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+            
+            # Crop to the centre square once, then scale to the embedded size
+            side = min(image.size)
+            left = (image.width - side) // 2
+            top = (image.height - side) // 2
+            image = image.crop((left, top, left + side, top + side))
+            if side > self.art_size:
+                image = image.resize((self.art_size, self.art_size), Image.LANCZOS)
+            
+            path = os.path.join(self.cache_dir, name)
+            temp_path = path + ".part"
+            image.save(temp_path, "JPEG", quality=90)
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+            with self.lock:
+                self.entries[name] = size
+                self.total_bytes += size
+                self.fetched += 1
+                self._evict()
+            return path
+        finally:
+            with self.lock:
+                self.inflight.pop(url, None)
+    
+    def release(self, url):
+        """Drop a pin taken by fetch(url, pin=True)"""
+        name = self.key(url)
+        with self.lock:
+            count = self.pins.get(name, 0) - 1
+            if count > 0:
+                self.pins[name] = count
+            else:
+                self.pins.pop(name, None)
+    
+    def _evict(self):
+        # Always keep the newest image, even if it alone exceeds the budget,
+        # and never delete a file a caller is about to read
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name = next((n for n in itertools.islice(self.entries, len(self.entries) - 1) if n not in self.pins), None)
+            if name is None:
+                break
+            size = self.entries.pop(name)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+class ThumbnailLoader:
+    """Decoded row thumbnails: their own small disk cache and fetch pool, and a memory-bounded LRU"""
+    
+    SIZE = 56
+    
+    def __init__(self, cache_dir, max_bytes=32 * 1024 * 1024, disk_bytes=20 * 1024 * 1024, workers=3):
+        # Stored at display size, apart from the 600 px cover art so neither evicts the other
+        self.cache = CoverArtCache(cache_dir, disk_bytes, workers, art_size=self.SIZE * 2)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.images = OrderedDict()  # video id -> (image, bytes), least recently used first
+        self.total_bytes = 0
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+    
+    def get(self, video_id):
+        """Decoded image for a video id, or None when it is not in memory"""
+        entry = self.images.get(video_id)
+        if entry is None:
+            return None
+        self.images.move_to_end(video_id)
+        return entry[0]
+    
+    def remember(self, video_id, image, size):
+        """Keep a decoded image, dropping the least recently shown ones over budget"""
+        if video_id in self.images:
+            self.total_bytes -= self.images.pop(video_id)[1]
+        self.images[video_id] = (image, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.images) > 1:
+            _, (_, dropped) = self.images.popitem(last=False)
+            self.total_bytes -= dropped
+    
+    def request(self, video_id, on_ready):
+        """Load a thumbnail in the background; on_ready(video_id, pil_image) runs on a pool thread"""
+        with self.lock:
+            if video_id in self.pending:
+                return
+            future = self.executor.submit(self._load, video_id)
+            self.pending[video_id] = future
+        
+        def done(future):
+            with self.lock:
+                if self.pending.get(video_id) is future:
+                    del self.pending[video_id]
+            if not future.cancelled() and future.exception() is None:
+                on_ready(video_id, future.result())
+        future.add_done_callback(done)
+    
+    def cancel_except(self, video_ids):
+        """Drop queued loads for rows no longer on screen"""
+        with self.lock:
+            stale = [future for video_id, future in self.pending.items() if video_id not in video_ids]
+        # Outside the lock: cancel() runs the done callback, which takes it. Loads
+        # already running cannot be cancelled and finish into the disk cache
+        for future in stale:
+            future.cancel()
+    
+    def _load(self, video_id):
+        path = self.cache.fetch(thumbnail_url(video_id)).result()
+        with Image.open(path) as image:
+            return image.convert("RGB")
+    
+    def shutdown(self):
+        self.cancel_except(set())
+        self.executor.shutdown(wait=False)
+        self.cache.shutdown()
+
+def write_metadata_tags(path, tags):
+    """Set Vorbis comments in place, saving only if something changed; returns True if saved"""
+    audio = OggOpus(path)
+    changed = False
+    for key, value in tags.items():
+        values = [str(value)] if value not in (None, "") else []
+        if (audio.get(key) or []) == values:
+            continue
+        if values:
+            audio[key] = values
+        else:
+            del audio[key]
+        changed = True
+    if changed:
+        audio.save()
+    return changed
+
+def embed_cover_art(audio_path, image_path):
+    """Write a JPEG into an opus file as its front cover picture"""
+    with open(image_path, "rb") as f:
+        data = f.read()
+    picture = Picture()
+    picture.type = 3  # front cover
+    picture.mime = "image/jpeg"
+    picture.width, picture.height = Image.open(image_path).size
+    picture.depth = 24
+    picture.data = data
+    
+    audio = OggOpus(audio_path)
+    audio["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
+    audio.save()
+
+# ReplayGain 2.0 and Opus (RFC 7845) reference levels
+REPLAYGAIN_REFERENCE_LUFS = -18.0
+R128_REFERENCE_LUFS = -23.0
+
+def file_digest(path):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def audio_digest(path):
+    """SHA-1 of an Ogg file's audio data, so rewriting its tags keeps the digest
+    
+    The first two packets (identification and comment headers) and the page
+    framing, whose sequence numbers and CRCs change with the tags, are skipped.
+    """
+    digest = hashlib.sha1()
+    packets = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(27)
+            if len(header) < 27:
+                break
+            if header[:4] != b"OggS":
+                # Not Ogg after all, fall back to the whole file
+                return file_digest(path)
+            lacing = f.read(header[26])
+            data = f.read(sum(lacing))
+            if packets >= 2:
+                digest.update(data)
+            else:
+                packets += sum(1 for size in lacing if size < 255)
+    return digest.hexdigest()
+
+FFMPEG_DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+def measure_loudness(path, timeout=600):
+    """EBU R128 integrated loudness (LUFS) and true peak (dBTP) of an audio file via ffmpeg"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-i", path,
+        "-af", "loudnorm=print_format=json", "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    start = result.stderr.rfind("{")
+    if result.returncode != 0 or start < 0:
+        raise RuntimeError(f"ffmpeg analysis failed for {os.path.basename(path)}")
+    stats = json.loads(result.stderr[start:result.stderr.rindex("}") + 1])
+    measured = {'lufs': float(stats['input_i']), 'peak_db': float(stats['input_tp'])}
+    duration = FFMPEG_DURATION_PATTERN.search(result.stderr)
+    if duration:
+        hours, minutes, seconds = duration.groups()
+        measured['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return measured
+
+def album_loudness(results):
+    """Album loudness from per-track results, energy-weighted by duration"""
+    total = sum(r['duration'] for r in results)
+    if not results or total <= 0:
+        return None
+    energy = sum(r['duration'] * 10 ** (r['lufs'] / 10) for r in results)
+    return {
+        'lufs': 10 * math.log10(energy / total),
+        'peak_db': max(r['peak_db'] for r in results)
+    }
+
+def write_gain_tags(path, track, album=None):
+    """Store R128 and ReplayGain tags in an opus file instead of re-encoding it"""
+    audio = OggOpus(path)
+    for prefix, result in (("TRACK", track), ("ALBUM", album)):
+        if result is None:
+            continue
+        # R128 gains are Q7.8 fixed point relative to -23 LUFS
+        r128_gain = round((R128_REFERENCE_LUFS - result['lufs']) * 256)
+        audio[f"R128_{prefix}_GAIN"] = [str(max(-32768, min(32767, r128_gain)))]
+        audio[f"REPLAYGAIN_{prefix}_GAIN"] = [f"{REPLAYGAIN_REFERENCE_LUFS - result['lufs']:.2f} dB"]
+        audio[f"REPLAYGAIN_{prefix}_PEAK"] = [f"{10 ** (result['peak_db'] / 20):.6f}"]
+    audio.save()
+
+class LoudnessAnalyzer:
+    """Parallel loudness analysis with results cached by video id and audio data hash"""
+    
+    def __init__(self, cache_path, workers=None):
+        self.cache_path = cache_path
+        # Each analysis is an ffmpeg child process, so one per core keeps the CPU busy
+        self.workers = workers or os.cpu_count() or 2
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.lock = threading.Lock()
+        self.results = {}
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                self.results = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.results)
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.cache_path)
+    
+    def _cached(self, video_id, path):
+        """Cached result if the audio is unchanged; stat first, hash only when the stat differs
+        
+        Only the audio data is hashed, so tags written by anything, or a crash
+        before retarget, never cost a new analysis.
+        """
+        stat = os.stat(path)
+        with self.lock:
+            result = self.results.get(video_id)
+        if result is None:
+            return None, stat, None
+        if (result['size'], result['mtime_ns']) == (stat.st_size, stat.st_mtime_ns) and 'audio_hash' in result:
+            return result, stat, result['audio_hash']
+        digest = audio_digest(path)
+        if 'audio_hash' not in result:
+            # Entries from before audio hashing hold a whole-file hash
+            return (result if result.get('hash') == file_digest(path) else None), stat, digest
+        return (result if result['audio_hash'] == digest else None), stat, digest
+    
+    def _analyse_one(self, track):
+        result, stat, digest = self._cached(track['id'], track['path'])
+        if result is not None:
+            if result['mtime_ns'] != stat.st_mtime_ns or 'audio_hash' not in result:
+                result = self.remember(track['id'], track['path'], result, digest)
+            return result, True
+        
+        result = measure_loudness(track['path'])
+        # Album gain weighs tracks by length; ffmpeg's own duration covers unknown ones
+        result['duration'] = result.get('duration') or float(track.get('duration') or 0)
+        self.remember(track['id'], track['path'], result, digest)
+        return result, False
+    
+    def retarget(self, video_id, path):
+        """Follow a tag-only rewrite of a file so its cached result stays valid"""
+        with self.lock:
+            result = self.results.get(video_id)
+        if result is not None:
+            # Tags changed, the audio did not: keep its hash instead of reading the file again
+            self.remember(video_id, path, result, result.get('audio_hash'))
+    
+    def remember(self, video_id, path, result, digest=None):
+        """Record a result against the file as it is now on disk"""
+        stat = os.stat(path)
+        result = dict(result, size=stat.st_size, mtime_ns=stat.st_mtime_ns, audio_hash=digest or audio_digest(path))
+        result.pop('hash', None)
+        with self.lock:
+            self.results[video_id] = result
+        return result
+    
+    def analyse(self, tracks):
+        """Analyse tracks in parallel; returns ({video_id: result}, cached count, errors)"""
+        futures = {track['id']: self.executor.submit(self._analyse_one, track) for track in tracks}
+        results, cached, errors = {}, 0, []
+        for video_id, future in futures.items():
+            try:
+                result, hit = future.result()
+            except Exception as e:
+                errors.append((video_id, e))
+                continue
+            results[video_id] = result
+            cached += hit
+        self.save()
+        return results, cached, errors
+    
+    def set_workers(self, workers):
+        """Resize the analysis pool; running analyses finish on the old one"""
+        old = self.executor
+        self.workers = max(1, workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        old.shutdown(wait=False)
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+class PlaylistSnapshots:
+    """Per-playlist record of synced entries, their positions and view files"""
+    
+    def __init__(self, library):
+        self.snapshot_dir = os.path.join(library.root, "snapshots")
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+    
+    def _path(self, playlist_id):
+        return os.path.join(self.snapshot_dir, f"{playlist_id}.json")
+    
+    def load(self, playlist_id):
+        """Return the stored snapshot, or an empty one for a new playlist"""
+        try:
+            with open(self._path(playlist_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'playlist_id': playlist_id, 'url': None, 'entries': [], 'excluded': []}
+    
+    def save(self, snapshot):
+        """Write a snapshot atomically so an interrupted sync keeps the old one"""
+        path = self._path(snapshot['playlist_id'])
+        snapshot['updated'] = time.time()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+    
+    def list_all(self):
+        """Return every stored snapshot"""
+        snapshots = []
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            if name.endswith(".json"):
+                snapshots.append(self.load(name[:-5]))
+        return snapshots
+    
+    @staticmethod
+    def diff(old_entries, new_entries):
+        """Split a playlist change into added, removed, moved and unchanged entries"""
+        old_by_id = {entry['id']: entry for entry in old_entries}
+        new_ids = {entry['id'] for entry in new_entries}
+        
+        changes = {'added': [], 'removed': [], 'moved': [], 'unchanged': []}
+        for entry in new_entries:
+            old = old_by_id.get(entry['id'])
+            if old is None:
+                changes['added'].append(entry)
+            elif old['position'] != entry['position']:
+                changes['moved'].append((old, entry))
+            else:
+                changes['unchanged'].append((old, entry))
+        changes['removed'] = [entry for entry in old_entries if entry['id'] not in new_ids]
+        return changes
+
+class PlaylistModel:
+    """Column-oriented playlist entries with a selection bitset, no widget references"""
+    
+    __slots__ = ('ids', 'titles', 'durations', 'selection', 'selected_count', 'selected_seconds')
+    
+    UNKNOWN_DURATION = -1
+    
+    def __init__(self):
+        self.ids = []
+        self.titles = []
+        self.durations = array('i')
+        self.selection = bytearray()
+        self.selected_count = 0
+        self.selected_seconds = 0
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def append(self, video_id, title, duration_seconds=None, selected=True):
+        """Add an entry at the end of the playlist"""
+        index = len(self.ids)
+        # Ids repeat across playlists and sessions, share one string object
+        self.ids.append(sys.intern(video_id))
+        self.titles.append(title)
+        self.durations.append(self.UNKNOWN_DURATION if duration_seconds is None else duration_seconds)
+        if index % 8 == 0:
+            self.selection.append(0)
+        if selected:
+            self.set_selected(index, True)
+    
+    def url(self, index):
+        return f"https://www.youtube.com/watch?v={self.ids[index]}"
+    
+    def duration(self, index):
+        """Duration in seconds, or None when unknown"""
+        seconds = self.durations[index]
+        return None if seconds == self.UNKNOWN_DURATION else seconds
+    
+    def is_selected(self, index):
+        return bool(self.selection[index >> 3] >> (index & 7) & 1)
+    
+    def set_selected(self, index, value):
+        """Select or deselect one entry; returns True if it changed"""
+        if self.is_selected(index) == value:
+            return False
+        self.selection[index >> 3] ^= 1 << (index & 7)
+        sign = 1 if value else -1
+        self.selected_count += sign
+        self.selected_seconds += sign * max(self.durations[index], 0)
+        return True
+    
+    def toggle(self, index):
+        self.set_selected(index, not self.is_selected(index))
+    
+    def set_many(self, indices, value):
+        """Select or deselect a group of entries; returns how many changed"""
+        return sum(self.set_selected(index, value) for index in indices)
+    
+    def set_all(self, value):
+        self.selection[:] = bytes([0xFF if value else 0]) * len(self.selection)
+        self._mask_tail()
+        self._recount()
+    
+    def invert(self):
+        self.selection[:] = bytes(b ^ 0xFF for b in self.selection)
+        self._mask_tail()
+        self._recount()
+    
+    def _mask_tail(self):
+        # Bits past the last entry must stay clear
+        extra = len(self.selection) * 8 - len(self.ids)
+        if extra:
+            self.selection[-1] &= 0xFF >> extra
+    
+    def _recount(self):
+        self.selected_count = 0
+        self.selected_seconds = 0
+        for index in self.selected_indices():
+            self.selected_count += 1
+            self.selected_seconds += max(self.durations[index], 0)
+    
+    def selected_indices(self):
+        """Indices of selected entries in playlist order"""
+        for byte_index, byte in enumerate(self.selection):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield base + bit
+    
+    def entry(self, index):
+        """Plain dict for one entry, used to build download jobs"""
+        return {
+            'id': self.ids[index],
+            'title': self.titles[index],
+            'url': self.url(index),
+            'duration_seconds': self.duration(index),
+            'index': index
+        }
+    
+    def memory_usage(self):
+        """Approximate bytes held by the model, including the strings"""
+        total = sys.getsizeof(self.ids) + sys.getsizeof(self.titles)
+        total += sys.getsizeof(self.durations) + sys.getsizeof(self.selection)
+        total += sum(sys.getsizeof(s) for s in self.ids)
+        total += sum(sys.getsizeof(s) for s in self.titles)
+        return total
+
+class TitleSearchIndex:
+    """Trigram index over playlist titles for instant substring filtering"""
+    
+    def __init__(self, titles):
+        self.titles = [title.casefold() for title in titles]
+        postings = {}
+        for index, title in enumerate(self.titles):
+            for gram in {title[i:i + 3] for i in range(len(title) - 2)}:
+                postings.setdefault(gram, []).append(index)
+        self.postings = {gram: array('i', indices) for gram, indices in postings.items()}
+    
+    def search(self, query):
+        """Indices of titles containing every term of the query, in playlist order"""
+        terms = query.casefold().split()
+        if not terms:
+            return list(range(len(self.titles)))
+        
+        candidates = None
+        for term in terms:
+            if len(term) < 3:
+                # Too short for a trigram, checked by the substring pass below
+                continue
+            grams = {term[i:i + 3] for i in range(len(term) - 2)}
+            postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+            matches = set(postings[0])
+            for posting in postings[1:]:
+                if not matches:
+                    break
+                matches.intersection_update(posting)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        
+        pool = sorted(candidates) if candidates is not None else range(len(self.titles))
+        return [i for i in pool if all(term in self.titles[i] for term in terms)]
+
+DEFAULT_TRACK_SECONDS = 240
+JOB_OVERHEAD_SECONDS = 4.0
+TRANSFER_FACTOR = 0.02
+
+# Opus output from YouTube audio averages well under this bitrate
+ESTIMATED_BITRATE_KBPS = 160
+FREE_SPACE_WATERMARK = 512 * 1024 * 1024
+
+def estimate_output_bytes(seconds):
+    """Expected size of an opus file of the given duration"""
+    return int(seconds * ESTIMATED_BITRATE_KBPS * 1000 / 8)
+
+def format_size(num_bytes):
+    """Human readable byte count"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def estimate_job_seconds(job):
+    """Rough wall-clock cost of a job from its audio duration"""
+    duration = job.get('duration') or DEFAULT_TRACK_SECONDS
+    return JOB_OVERHEAD_SECONDS + duration * TRANSFER_FACTOR
+
+def order_fifo(jobs):
+    """Submission order"""
+    return sorted(jobs, key=lambda job: job['seq'])
+
+def order_shortest_first(jobs):
+    """Short tracks first, lowest average wait per song"""
+    return sorted(jobs, key=lambda job: (estimate_job_seconds(job), job['seq']))
+
+def order_longest_first(jobs):
+    """Long tracks first, best makespan with several workers"""
+    return sorted(jobs, key=lambda job: (-estimate_job_seconds(job), job['seq']))
+
+def order_fair(jobs):
+    """Round-robin across queued playlists, submission order within each"""
+    groups = {}
+    for job in order_fifo(jobs):
+        groups.setdefault(job.get('group'), []).append(job)
+    ordered = []
+    for round_jobs in itertools.zip_longest(*groups.values()):
+        ordered.extend(job for job in round_jobs if job is not None)
+    return ordered
+
+SCHEDULING_POLICIES = {
+    "FIFO": order_fifo,
+    "Shortest first": order_shortest_first,
+    "Longest first": order_longest_first,
+    "Fair interleave": order_fair,
+}
+
+def estimate_makespan(jobs, workers):
+    """Simulate list scheduling of ordered jobs onto a number of workers"""
+    free_at = [0.0] * max(workers, 1)
+    for job in jobs:
+        start = heapq.heappop(free_at)
+        heapq.heappush(free_at, start + estimate_job_seconds(job))
+    return max(free_at)
+
+# Children get their own process group so cancel can take down ffmpeg too
+if os.name == "nt":
+    PROCESS_GROUP_KWARGS = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    PROCESS_GROUP_KWARGS = {'start_new_session': True}
+
+def terminate_process_tree(process, grace=3):
+    """Terminate a child and everything it spawned, escalating to a hard kill"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+            process.wait(timeout=grace)
+            return
+        
+        os.killpg(process.pid, signal.SIGTERM)
+        # A suspended group only sees SIGTERM once it runs again
+        os.killpg(process.pid, signal.SIGCONT)
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, subprocess.TimeoutExpired):
+        pass
+
+def suspend_process_tree(process, suspend=True):
+    """Stop or continue a child process group; a no-op on Windows"""
+    if os.name == "nt" or process is None or process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGSTOP if suspend else signal.SIGCONT)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+PROGRESS_LINE_PREFIX = "[progress]"
+
+class ProgressAggregator:
+    """Byte-weighted progress, smoothed throughput and ETA across concurrent jobs"""
+    
+    # Weight of the newest throughput sample in the moving average
+    SMOOTHING = 0.3
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.transferred = 0
+        self.rate = None
+        self._last_sample = None
+    
+    def add_jobs(self, jobs):
+        """Track new jobs, weighted by their expected size until the real one is known"""
+        with self.lock:
+            for job in jobs:
+                seconds = job.get('duration') or DEFAULT_TRACK_SECONDS
+                self.jobs[id(job)] = {'weight': estimate_output_bytes(float(seconds)), 'done': 0, 'finished': False}
+    
+    def update(self, job, downloaded, total=None):
+        """Record a job's byte progress; a smaller count than before means it restarted"""
+        with self.lock:
+            state = self.jobs.get(id(job))
+            if state is None or state['finished']:
+                return
+            if total:
+                state['weight'] = total
+            self.transferred += max(0, downloaded - state['done'])
+            state['done'] = min(downloaded, state['weight'])
+    
+    def finish(self, job, ok):
+        """A finished job counts as complete; a cancelled or failed one stops counting at all"""
+        with self.lock:
+            state = self.jobs.get(id(job))
+            if state is None:
+                return
+            state['finished'] = True
+            if ok:
+                state['done'] = state['weight']
+            else:
+                state['weight'] = state['done'] = 0
+    
+    def snapshot(self):
+        """(fraction done, bytes per second or None, seconds left or None)"""
+        now = time.monotonic()
+        with self.lock:
+            if self._last_sample is not None:
+                last_time, last_bytes = self._last_sample
+                if now - last_time >= 0.25:
+                    sample = (self.transferred - last_bytes) / (now - last_time)
+                    self.rate = sample if self.rate is None else (
+                        self.SMOOTHING * sample + (1 - self.SMOOTHING) * self.rate
+                    )
+                    self._last_sample = (now, self.transferred)
+            else:
+                self._last_sample = (now, self.transferred)
+            
+            weight = sum(state['weight'] for state in self.jobs.values())
+            done = sum(state['done'] for state in self.jobs.values())
+            rate = self.rate
+        
+        fraction = done / weight if weight else 0.0
+        eta = (weight - done) / rate if rate else None
+        return fraction, rate, eta
+    
+    def reset(self):
+        with self.lock:
+            self.jobs.clear()
+            self.transferred = 0
+            self.rate = None
+            self._last_sample = None
+
+SPACE_POLL_SECONDS = 5
+
+class JobCancelled(Exception):
+    """Raised inside a job whose cancellation was requested"""
+
+class JobRetry(Exception):
+    """Raised inside a job that should go back to the queue and run again"""
+
+def when_done(result, callback):
+    """callback(result) now, or once result resolves when it is a Future; returns its value or a Future of it"""
+    if not isinstance(result, Future):
+        return callback(result)
+    chained = Future()
+    
+    def relay(future):
+        try:
+            chained.set_result(callback(future.result()))
+        except BaseException as e:
+            chained.set_exception(e)
+    
+    result.add_done_callback(relay)
+    return chained
+
+class DownloadEngine:
+    """Shared worker pool that runs download jobs in scheduling-policy order"""
+    
+    # Times a job raising JobRetry is queued again before it counts as failed
+    MAX_RETRIES = 2
+    
+    def __init__(self, workers=4, policy="FIFO"):
+        self.workers = workers
+        self.policy = policy
+        self.pending = []
+        self.running = []
+        self.condition = threading.Condition()
+        self.batches = []
+        self.paused = False
+        self.closed = False
+        self.space_paths = []
+        self.min_free_bytes = 0
+        self.on_space_wait = None
+        self.waiting_for_space = False
+        self.group_size = 1
+        self._alive = 0
+        self._busy = 0
+        self._seq = itertools.count()
+    
+    def set_workers(self, workers):
+        """Grow or shrink the pool; surplus workers exit after their current job"""
+        with self.condition:
+            self.workers = max(1, workers)
+            self._spawn_workers()
+            self.condition.notify_all()
+    
+    def set_group_size(self, size):
+        """Most jobs handed to one run_many call; 1 runs every job on its own"""
+        with self.condition:
+            self.group_size = max(1, size)
+    
+    def set_policy(self, policy):
+        """Switch policy and reorder jobs that have not started yet"""
+        with self.condition:
+            self.policy = policy
+            self.pending = SCHEDULING_POLICIES[policy](self.pending)
+    
+    def set_space_watermark(self, paths, min_free_bytes, on_space_wait=None):
+        """Hold queued jobs while any of paths has less than min_free_bytes free"""
+        with self.condition:
+            self.space_paths = list(paths)
+            self.min_free_bytes = min_free_bytes
+            self.on_space_wait = on_space_wait
+            self.condition.notify_all()
+    
+    def _space_headroom(self):
+        """Bytes that may still be written before the tightest watched drive hits the watermark, None if unwatched"""
+        headroom = None
+        for path in self.space_paths:
+            try:
+                free = shutil.disk_usage(path).free - self.min_free_bytes
+            except OSError:
+                continue
+            headroom = free if headroom is None else min(headroom, free)
+        return headroom
+    
+    def pending_jobs(self):
+        with self.condition:
+            return list(self.pending)
+    
+    def is_idle(self):
+        """True when no batch has unfinished jobs"""
+        with self.condition:
+            return not self.batches
+    
+    def progress(self):
+        """Finished and total job counts over all unfinished batches"""
+        with self.condition:
+            return sum(b['done'] for b in self.batches), sum(b['total'] for b in self.batches)
+    
+    def submit_batch(self, jobs, run, on_job_done=None, on_finish=None, run_many=None):
+        """Queue jobs as one batch; run(job) returns True on success
+        
+        With a group size above 1, run_many(jobs) may be given several queued jobs
+        at once and returns one outcome per job: True, False or the exception it hit.
+        Either may also return a Future for work that finishes elsewhere; the worker
+        moves on at once and the job is settled when the Future resolves.
+        """
+        batch = {
+            'jobs': jobs,
+            'total': len(jobs),
+            'done': 0,
+            'successful': 0,
+            'cancelled': 0,
+            'event': threading.Event(),
+            'on_job_done': on_job_done,
+            'on_finish': on_finish
+        }
+        # Each batch is its own group for fair interleaving
+        group = next(self._seq)
+        with self.condition:
+            for job in jobs:
+                job.setdefault('group', group)
+                job['seq'] = next(self._seq)
+                job['batch'] = batch
+                job['run'] = run
+                job['run_many'] = run_many
+                job['state'] = 'queued'
+            self.pending = SCHEDULING_POLICIES[self.policy](self.pending + jobs)
+            self.batches.append(batch)
+            self._spawn_workers()
+            self.condition.notify_all()
+        
+        if not jobs:
+            self._finish_batch(batch)
+        return batch
+    
+    def run_process(self, job, cmd, timeout=None, on_line=None):
+        """Run a child for a job so that cancel and pause can reach it
+        
+        on_line, if given, is called with every output line as it arrives.
+        """
+        result = self.run_group_process([job], cmd, timeout, on_line)
+        if job.get('cancelled'):
+            raise JobCancelled()
+        return result
+    
+    def run_group_process(self, jobs, cmd, timeout=None, on_line=None):
+        """Run one child on behalf of several jobs; cancelling any of them stops it
+        
+        Unlike run_process this returns normally after a cancel, so the caller
+        can keep what the child finished for the other jobs.
+        """
+        with self.condition:
+            if all(job.get('cancelled') for job in jobs):
+                raise JobCancelled()
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                **PROCESS_GROUP_KWARGS
+            )
+            for job in jobs:
+                job['process'] = process
+            if self.paused:
+                suspend_process_tree(process)
+        
+        try:
+            if on_line is None:
+                stdout, stderr = process.communicate(timeout=timeout)
+            else:
+                stdout, stderr = self._stream_output(process, on_line, timeout)
+        except subprocess.TimeoutExpired:
+            terminate_process_tree(process)
+            raise
+        finally:
+            for job in jobs:
+                job['process'] = None
+        
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    
+    @staticmethod
+    def _stream_output(process, on_line, timeout=None):
+        """communicate() that also hands each line of either pipe to on_line"""
+        output = {'stdout': [], 'stderr': []}
+        
+        def pump(name):
+            for line in getattr(process, name):
+                output[name].append(line)
+                on_line(line.rstrip("\n"))
+        
+        readers = [threading.Thread(target=pump, args=(name,), daemon=True) for name in output]
+        for reader in readers:
+            reader.start()
+        process.wait(timeout=timeout)
+        for reader in readers:
+            reader.join()
+        return "".join(output['stdout']), "".join(output['stderr'])
+    
+    def cancel_job(self, job):
+        """Drop a queued job, or kill the children of a running one"""
+        with self.condition:
+            if job.get('state') not in ('queued', 'running'):
+                return False
+            job['cancelled'] = True
+            process = job.get('process')
+            dequeued = job['state'] == 'queued'
+            if dequeued:
+                self.pending = [j for j in self.pending if j is not job]
+                job['state'] = 'cancelled'
+        
+        if dequeued:
+            self._complete_job(job, False)
+        elif process:
+            # Killing can take a grace period, keep the caller responsive
+            threading.Thread(target=terminate_process_tree, args=(process,), daemon=True).start()
+        return True
+    
+    def cancel_all(self, batch=None):
+        """Cancel every job, or every job of one batch"""
+        with self.condition:
+            dropped = [j for j in self.pending if batch is None or j['batch'] is batch]
+            self.pending = [j for j in self.pending if not (batch is None or j['batch'] is batch)]
+            for job in dropped:
+                job['cancelled'] = True
+                job['state'] = 'cancelled'
+            running = [j for j in self.running if batch is None or j['batch'] is batch]
+        
+        for job in dropped:
+            self._complete_job(job, False)
+        for job in running:
+            self.cancel_job(job)
+        return len(dropped) + len(running)
+    
+    def pause(self):
+        """Stop dispatching jobs and suspend running children"""
+        with self.condition:
+            self.paused = True
+            running = list(self.running)
+        for job in running:
+            suspend_process_tree(job.get('process'))
+    
+    def resume(self):
+        """Continue suspended children and dispatch queued jobs again"""
+        with self.condition:
+            self.paused = False
+            running = list(self.running)
+            self.condition.notify_all()
+        for job in running:
+            suspend_process_tree(job.get('process'), suspend=False)
+    
+    def shutdown(self, grace=2):
+        """Cancel everything and wait briefly for children to exit"""
+        self.closed = True
+        self.cancel_all()
+        with self.condition:
+            processes = [j['process'] for j in self.running if j.get('process')]
+            self.workers = 0
+            self.condition.notify_all()
+        for process in processes:
+            terminate_process_tree(process, grace)
+    
+    def _spawn_workers(self):
+        while self._alive < self.workers:
+            self._alive += 1
+            threading.Thread(target=self._worker_loop, daemon=True).start()
+    
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                while (not self.pending or self.paused) and self._alive <= self.workers:
+                    self.condition.wait()
+                if self._alive > self.workers:
+                    self._alive -= 1
+                    return
+                headroom = self._space_headroom()
+                if headroom is not None and headroom < 0:
+                    # Poll rather than fail every queued job on a full disk
+                    if not self.waiting_for_space:
+                        self.waiting_for_space = True
+                        if self.on_space_wait:
+                            self.on_space_wait(True)
+                    self.condition.wait(SPACE_POLL_SECONDS)
+                    continue
+                if self.waiting_for_space:
+                    self.waiting_for_space = False
+                    if self.on_space_wait:
+                        self.on_space_wait(False)
+                job = self.pending.pop(0)
+                group = [job]
+                if self.group_size > 1 and job['run_many'] and not job.get('attempts'):
+                    # Later jobs of the same kind share the run; retries run alone to isolate failures.
+                    # Split the queue over the idle workers rather than one worker taking it all
+                    idle = max(1, self.workers - self._busy)
+                    limit = min(self.group_size, -(-(len(self.pending) + 1) // idle))
+                    # Every song of the group must fit above the space watermark, not just the first
+                    needed = self._job_bytes(job)
+                    for other in self.pending:
+                        if len(group) >= limit:
+                            break
+                        if other['run_many'] != job['run_many'] or other.get('attempts'):
+                            continue
+                        if headroom is not None and needed + self._job_bytes(other) > headroom:
+                            break
+                        group.append(other)
+                        needed += self._job_bytes(other)
+                    if len(group) > 1:
+                        self.pending = [j for j in self.pending if not any(j is g for g in group)]
+                for member in group:
+                    member['state'] = 'running'
+                self.running.extend(group)
+                self._busy += 1
+            try:
+                if len(group) > 1:
+                    self._run_group(group)
+                else:
+                    self._run_job(job)
+            finally:
+                with self.condition:
+                    self._busy -= 1
+    
+    @staticmethod
+    def _job_bytes(job):
+        return estimate_output_bytes(job.get('duration') or DEFAULT_TRACK_SECONDS)
+    
+    def _run_job(self, job):
+        try:
+            outcome = job['run'](job)
+        except Exception as e:
+            outcome = e
+        self._settle_job(job, outcome)
+    
+    def _run_group(self, jobs):
+        try:
+            outcomes = jobs[0]['run_many'](jobs)
+        except Exception as e:
+            outcomes = [e] * len(jobs)
+        for job, outcome in zip(jobs, outcomes):
+            self._settle_job(job, outcome)
+    
+    @staticmethod
+    def _future_outcome(future):
+        if future.cancelled():
+            return JobCancelled()
+        return future.exception() or future.result()
+    
+    def _settle_job(self, job, outcome):
+        """Complete, fail or requeue a job from its outcome: True, False, the exception it raised or a Future of one"""
+        if isinstance(outcome, Future):
+            # Still running in the job's place, e.g. verification; the worker is free meanwhile
+            outcome.add_done_callback(lambda future: self._settle_job(job, self._future_outcome(future)))
+            return
+        if not isinstance(outcome, Exception):
+            outcome = bool(outcome)
+        ok = outcome is True
+        retry = False
+        if isinstance(outcome, JobRetry):
+            job['error'] = str(outcome)
+            retry = job.get('attempts', 0) < self.MAX_RETRIES
+        elif isinstance(outcome, Exception) and not isinstance(outcome, JobCancelled):
+            job['error'] = str(outcome)
+        
+        with self.condition:
+            self.running = [j for j in self.running if j is not job]
+            if retry and not job.get('cancelled') and not self.closed:
+                # Back of the queue in policy order, the batch stays open
+                job['attempts'] = job.get('attempts', 0) + 1
+                job['state'] = 'queued'
+                self.pending = SCHEDULING_POLICIES[self.policy](self.pending + [job])
+                self.condition.notify()
+                return
+            job['state'] = 'cancelled' if job.get('cancelled') and not ok else 'done'
+        self._complete_job(job, ok)
+    
+    def _complete_job(self, job, ok):
+        batch = job['batch']
+        with self.condition:
+            batch['done'] += 1
+            batch['successful'] += ok
+            batch['cancelled'] += job['state'] == 'cancelled'
+            finished = batch['done'] == batch['total']
+        
+        if batch['on_job_done'] and not self.closed:
+            batch['on_job_done'](job, ok)
+        if finished:
+            self._finish_batch(batch)
+    
+    def _finish_batch(self, batch):
+        with self.condition:
+            self.batches = [b for b in self.batches if b is not batch]
+        if batch['on_finish'] and not self.closed:
+            batch['on_finish'](batch)
+        batch['event'].set()
+
+class TrackFetcher:
+    """Downloads single tracks into a library through a staging folder, the info cache and verification"""
+    
+    # Retries inside one yt-dlp run ride out short blips; longer outages end the run
+    # and the errors below send the job back to the engine's queue instead
+    FETCH_RETRIES = 3
+    
+    # yt-dlp errors worth another attempt later: rate limits, server errors, dropped connections
+    TRANSIENT_ERRORS = re.compile(
+        r"HTTP Error (?:429|5\d\d)|IncompleteRead|timed out|Connection (?:reset|aborted|refused)|"
+        r"Remote end closed|Temporary failure in name resolution",
+        re.IGNORECASE
+    )
+    
+    def __init__(self, engine, info_cache, staging_copier, verifier, log=None, on_progress=None):
+        self.engine = engine
+        self.info_cache = info_cache
+        self.staging_copier = staging_copier
+        self.verifier = verifier
+        self.staging_location = None
+        self.log = log or (lambda message, level="info", **fields: print(message))
+        self.on_progress = on_progress
+        
+    def staging_root(self, library):
+        """Folder that holds in-progress downloads for a library"""
+        return self.staging_location or library.default_staging_dir()
+        
+    def fetch(self, library, url, video_id=None, job=None):
+        """Download a track into the library unless it is already stored"""
+        video_id = video_id or extract_video_id(url)
+        if video_id:
+            track = library.get_track(video_id)
+            if track:
+                return track
+                
+        # Partial and intermediate files stay in a private staging folder
+        staging_root = self.staging_root(library)
+        os.makedirs(staging_root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix="fetch-", dir=staging_root)
+        stored = []
+        try:
+            info_path = self.info_cache.fresh(video_id) if video_id else None
+            result = self._run_fetch(staging_dir, url, info_path, job)
+            if result.returncode != 0 and info_path:
+                # Stream URLs can be revoked before their stamp; extract again
+                self.info_cache.invalidate(video_id)
+                result = self._run_fetch(staging_dir, url, None, job)
+            if result.returncode != 0:
+                if job is not None:
+                    job['stderr'] = stderr_excerpt(result.stderr)
+                self._raise_if_transient(result.stderr)
+                return None
+                
+            for line in reversed(result.stdout.strip().split('\n')):
+                try:
+                    info = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(info, dict) or not info.get('id'):
+                    continue
+                staged = os.path.join(staging_dir, f"{info['id']}.{library.AUDIO_EXT}")
+                if os.path.isfile(staged):
+                    check = self.verifier.submit(staged, (job or {}).get('duration') or info.get('duration'))
+                    stored.append(self._store_staged(library, staged, info, check, job))
+                    return stored[-1]
+            return None
+        finally:
+            self._remove_when_stored(staging_dir, stored)
+            
+    def fetch_many(self, library, jobs):
+        """Download several tracks with one yt-dlp process; returns a track, None or an exception per job
+        
+        Songs are matched back to their jobs by the video id in yt-dlp's printed
+        info and progress lines, so one bad song only fails its own job. Songs
+        still being verified come back as Futures of their track.
+        """
+        outcomes = [None] * len(jobs)
+        wanted = {}
+        for index, job in enumerate(jobs):
+            video_id = job.get('id') or extract_video_id(job['url'])
+            track = library.get_track(video_id) if video_id else None
+            if track:
+                outcomes[index] = track
+            elif video_id:
+                wanted.setdefault(video_id, []).append(index)
+            else:
+                # Nothing to match the output against
+                try:
+                    outcomes[index] = self.fetch(library, job['url'], None, job)
+                except Exception as e:
+                    outcomes[index] = e
+        if not wanted:
+            return outcomes
+            
+        staging_root = self.staging_root(library)
+        os.makedirs(staging_root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix="fetch-", dir=staging_root)
+        stored = []
+        try:
+            batch_file = os.path.join(staging_dir, "urls.txt")
+            with open(batch_file, "w", encoding="utf-8") as f:
+                f.write("".join(canonical_song_url(video_id) + "\n" for video_id in wanted))
+            jobs_by_id = {video_id: jobs[indices[0]] for video_id, indices in wanted.items()}
+            cmd = self._fetch_command(staging_dir) + [
+                "--no-abort-on-error", "--write-info-json", "--batch-file", batch_file
+            ]
+            try:
+                result = self.engine.run_group_process(
+                    list(jobs_by_id.values()), cmd,
+                    on_line=lambda line: self._on_progress_line(None, line, jobs_by_id)
+                )
+            except Exception as e:
+                for indices in wanted.values():
+                    for index in indices:
+                        outcomes[index] = e
+                return outcomes
+                
+            infos = {}
+            for line in result.stdout.split('\n'):
+                try:
+                    info = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(info, dict) and info.get('id') in wanted:
+                    infos[info['id']] = info
+                    
+            checks = {}
+            for video_id, info in infos.items():
+                staged = os.path.join(staging_dir, f"{video_id}.{library.AUDIO_EXT}")
+                if os.path.isfile(staged):
+                    expected = jobs_by_id[video_id].get('duration') or info.get('duration')
+                    checks[video_id] = (staged, self.verifier.submit(staged, expected))
+                    
+            interrupted = any(job.get('cancelled') for job in jobs_by_id.values())
+            for video_id, indices in wanted.items():
+                job = jobs_by_id[video_id]
+                if job.get('cancelled'):
+                    outcome = JobCancelled()
+                elif video_id in checks:
+                    staged, check = checks[video_id]
+                    outcome = self._store_staged(library, staged, infos[video_id], check, job)
+                    stored.append(outcome)
+                elif interrupted:
+                    # Killed because another song of the group was cancelled
+                    outcome = JobRetry("download group was cancelled")
+                else:
+                    lines = "\n".join(line for line in result.stderr.splitlines() if video_id in line)
+                    job['stderr'] = stderr_excerpt(lines or result.stderr)
+                    try:
+                        self._raise_if_transient(lines or result.stderr)
+                        outcome = None
+                    except JobRetry as e:
+                        outcome = e
+                for index in indices:
+                    outcomes[index] = outcome
+            return outcomes
+        finally:
+            self._remove_when_stored(staging_dir, stored)
+            
+    def _raise_if_transient(self, stderr):
+        """Send the job back to the queue when yt-dlp failed on something that usually passes"""
+        match = self.TRANSIENT_ERRORS.search(stderr or "")
+        if match:
+            raise JobRetry(f"transient download error: {match.group(0)}")
+            
+    @staticmethod
+    def _remove_when_stored(staging_dir, stored):
+        """Delete a staging folder once every staged file in it has been moved out or given up on"""
+        remaining = [len(stored)]
+        lock = threading.Lock()
+        
+        def release(_future=None):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        if not stored:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        for future in stored:
+            future.add_done_callback(release)
+            
+    def _store_staged(self, library, staged, info, check, job):
+        """Future of the track, stored once verification passes; the caller does not wait for it"""
+        stored = Future()
+        
+        def store(check):
+            try:
+                self._verify_staged(check, info['id'], job)
+                self.staging_copier.move(staged, library.track_path(info['id']))
+                stored.set_result(library.add_track(
+                    info['id'], info.get('title') or info['id'], info.get('duration'), info.get('ext'),
+                    info.get('thumbnail'), info.get('artist') or info.get('uploader'), info.get('album')
+                ))
+            except BaseException as e:
+                stored.set_exception(e)
+        
+        check.add_done_callback(store)
+        return stored
+        
+    def _verify_staged(self, check, video_id, job):
+        """Raise for a staged file whose verification failed; broken files send the job back to the queue"""
+        try:
+            check.result()
+        except VerificationError as e:
+            # The cached stream may be the culprit, extract afresh next time
+            self.info_cache.invalidate(video_id)
+            title = job['title'][:30] if job else video_id
+            self.log(f"🔍 Verification failed for {title}: {e}", "warning", job=video_id, stage="verify")
+            raise JobRetry(f"verification failed: {e}")
+            
+    def _fetch_command(self, staging_dir):
+        """yt-dlp arguments shared by single and grouped fetches into a staging folder"""
+        return [
+            "yt-dlp",
+            "--extract-audio",
+            "--audio-format", "opus",
+            "--output", os.path.join(staging_dir, "%(id)s.%(ext)s"),
+            "--output", self.info_cache.output_template(),
+            "--print", "after_move:%(.{id,duration,ext,thumbnail,title,artist,album,uploader})j",
+            "--retries", str(self.FETCH_RETRIES),
+            "--fragment-retries", str(self.FETCH_RETRIES),
+            "--progress",
+            "--newline",
+            "--progress-template", "download:" + PROGRESS_LINE_PREFIX
+            + "%(info.id)s|%(progress.downloaded_bytes)s|%(progress.total_bytes)s|%(progress.total_bytes_estimate)s",
+            "--no-playlist",
+            "--no-warnings"
+        ]
+        
+    def _run_fetch(self, staging_dir, url, info_path=None, job=None):
+        """Run yt-dlp for one track into a staging folder, from a cached info JSON when one is given"""
+        cmd = self._fetch_command(staging_dir)
+        if info_path:
+            cmd += ["--load-info-json", info_path]
+        else:
+            cmd += ["--write-info-json", url]
+            
+        if job is not None:
+            return self.engine.run_process(job, cmd, on_line=lambda line: self._on_progress_line(job, line))
+        return subprocess.run(cmd, capture_output=True, text=True)
+        
+    def _on_progress_line(self, job, line, jobs_by_id=None):
+        """Feed a yt-dlp progress line into the progress callback, finding the job by id in grouped fetches (worker thread)"""
+        if self.on_progress is None or not line.startswith(PROGRESS_LINE_PREFIX):
+            return
+        video_id, downloaded, total, estimate = (line[len(PROGRESS_LINE_PREFIX):].split("|") + ["NA"] * 3)[:4]
+        if jobs_by_id is not None:
+            job = jobs_by_id.get(video_id)
+            if job is None:
+                return
+        try:
+            downloaded = int(float(downloaded))
+        except ValueError:
+            return
+        total = next((int(float(v)) for v in (total, estimate) if v not in ("NA", "None", "")), None)
+        self.on_progress(job, downloaded, total)
+
+class WorkQueueBackend(ABC):
+    """Shared job queue with leases, so jobs of a worker that dies are handed out again"""
+    
+    @abstractmethod
+    def submit(self, batch_id, payloads):
+        """Queue payload dicts under a batch id; returns their queue ids in order"""
+        
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds):
+        """Claim the next job as a payload dict with its 'queue_id', or None when the queue is empty"""
+        
+    @abstractmethod
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        """Extend a lease; False when the worker no longer holds it"""
+        
+    @abstractmethod
+    def release(self, job_id, worker_id):
+        """Give a leased job back to the queue unfinished"""
+        
+    @abstractmethod
+    def complete(self, job_id, worker_id, ok, result):
+        """Store a job's result; False when the lease was lost in the meantime"""
+        
+    @abstractmethod
+    def poll_results(self, batch_id):
+        """Finished jobs of a batch not reported yet, as (queue id, state, result) tuples"""
+        
+    @abstractmethod
+    def cancel_batch(self, batch_id):
+        """Cancel the queued and leased jobs of a batch; returns how many"""
+        
+    def close(self):
+        """Release the backend's connections"""
+
+class SQLiteWorkQueue(WorkQueueBackend):
+    """Work queue in an SQLite file that every worker can open, e.g. on a shared drive"""
+    
+    # Leases that expired this often are treated as jobs that kill their worker
+    MAX_ATTEMPTS = 3
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'queued',
+            worker TEXT,
+            lease_until REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            reported INTEGER NOT NULL DEFAULT 0,
+            updated REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+        CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, reported);
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self._db().executescript(self.SCHEMA)
+        
+    def _db(self):
+        # sqlite3 connections belong to the thread that opened them
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.local.db = db
+        return db
+        
+    def _transaction(self, work):
+        db = self._db()
+        # Take the write lock up front so two workers never lease the same job
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(db)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return result
+        
+    def submit(self, batch_id, payloads):
+        now = time.time()
+        return self._transaction(lambda db: [
+            db.execute(
+                "INSERT INTO jobs (batch, payload, updated) VALUES (?, ?, ?)",
+                (batch_id, json.dumps(payload), now)
+            ).lastrowid
+            for payload in payloads
+        ])
+        
+    def lease(self, worker_id, lease_seconds):
+        def work(db):
+            now = time.time()
+            db.execute(
+                "UPDATE jobs SET state = 'failed', result = ?, reported = 0, updated = ? "
+                "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (json.dumps({'error': f"lease expired {self.MAX_ATTEMPTS} times"}), now, now, self.MAX_ATTEMPTS)
+            )
+            row = db.execute(
+                "SELECT id, payload FROM jobs WHERE state = 'queued' OR (state = 'leased' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row[0])
+            )
+            payload = json.loads(row[1])
+            payload['queue_id'] = row[0]
+            return payload
+        return self._transaction(work)
+        
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        now = time.time()
+        cursor = self._db().execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            (now + lease_seconds, now, job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+        
+    def release(self, job_id, worker_id):
+        self._db().execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, lease_until = NULL, attempts = attempts - 1, updated = ? "
+            "WHERE id = ? AND worker = ? AND state = 'leased'",
+            (time.time(), job_id, worker_id)
+        )
+        
+    def complete(self, job_id, worker_id, ok, result):
+        cursor = self._db().execute(
+            "UPDATE jobs SET state = ?, result = ?, updated = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            ('done' if ok else 'failed', json.dumps(result), time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+        
+    def poll_results(self, batch_id):
+        def work(db):
+            rows = db.execute(
+                "SELECT id, state, result FROM jobs "
+                "WHERE batch = ? AND reported = 0 AND state IN ('done', 'failed', 'cancelled')",
+                (batch_id,)
+            ).fetchall()
+            db.executemany("UPDATE jobs SET reported = 1 WHERE id = ?", [(row[0],) for row in rows])
+            return [(job_id, state, json.loads(result) if result else {}) for job_id, state, result in rows]
+        return self._transaction(work)
+        
+    def cancel_batch(self, batch_id):
+        cursor = self._db().execute(
+            "UPDATE jobs SET state = 'cancelled', updated = ? WHERE batch = ? AND state IN ('queued', 'leased')",
+            (time.time(), batch_id)
+        )
+        return cursor.rowcount
+        
+    def close(self):
+        db = getattr(self.local, 'db', None)
+        if db is not None:
+            db.close()
+            self.local.db = None
 
-# Set appearance mode
-ctk.set_appearance_mode("dark")
+WORK_QUEUE_BACKENDS = {
+    "sqlite": SQLiteWorkQueue,
+}
 
-class ModernTheme:
-    """Modern fluent design theme with glassmorphism effects"""
+def open_work_queue(spec):
+    """Open a work queue from 'backend:location'; a bare path is an SQLite file"""
+    kind, separator, location = spec.partition(":")
+    if separator and kind in WORK_QUEUE_BACKENDS:
+        return WORK_QUEUE_BACKENDS[kind](location)
+    return SQLiteWorkQueue(spec)
+
+class QueueWorker:
+    """Headless downloader that drains a shared work queue (python final.py --worker)"""
     
-    def __init__(self):
-        # Modern color palette - Deep blues with accent colors
-        self.colors = {
-            # Backgrounds - Modern dark theme
-            'bg_primary': '#0A0A0B',           # Deep black
-            'bg_secondary': '#111114',         # Dark gray
-            'bg_tertiary': '#1A1A1E',          # Medium gray
-            'bg_card': '#1E1E23',              # Card background
-            'bg_surface': '#252529',           # Surface color
-            'bg_glass': '#1A1A1E',             # Glass effect
+    LEASE_SECONDS = 120
+    IDLE_POLL_SECONDS = 2
+    
+    def __init__(self, backend, workers=None, library_dir=None):
+        config = load_config()
+        self.backend = backend
+        self.library_dir = library_dir
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.engine = DownloadEngine(workers=workers or tuned_setting(config, 'download_workers', 4))
+        self.fetcher = TrackFetcher(
+            self.engine,
+            InfoJsonCache(os.path.join(APP_DATA_DIR, "info")),
+            StagingCopier(tuned_setting(config, 'copy_workers', 1)),
+            TrackVerifier(tuned_setting(config, 'verify_workers', 2)),
+            log=self.log
+        )
+        self.active = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.stopped = threading.Event()
+        
+    def log(self, message, level="info", **fields):
+        """Print a timestamped log line"""
+        print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+        
+    def stop(self, *args):
+        """Stop leasing, cancel running jobs and hand them back to the queue"""
+        if not self.stopping.is_set():
+            self.log("⛔ Stopping, returning running jobs to the queue...", "warning")
+            self.stopping.set()
             
-            # Modern accent colors
-            'accent_primary': '#007AFF',       # iOS Blue
-            'accent_secondary': '#5856D6',     # Purple
-            'accent_success': '#34C759',       # Green
-            'accent_warning': '#FF9500',       # Orange
-            'accent_error': '#FF3B30',         # Red
-            'accent_pink': '#FF2D92',          # Pink
-            'accent_teal': '#5AC8FA',          # Teal
-            'accent_indigo': '#5856D6',        # Indigo
+    def run(self):
+        """Lease and download jobs until stopped"""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        self.log(f"🌐 Worker {self.worker_id} started with {self.engine.workers} parallel downloads", "success")
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        
+        while not self.stopping.is_set():
+            with self.lock:
+                busy = len(self.active)
+            if busy >= self.engine.workers:
+                self.stopping.wait(0.5)
+                continue
+            try:
+                payload = self.backend.lease(self.worker_id, self.LEASE_SECONDS)
+            except Exception as e:
+                self.log(f"⚠️ Work queue unavailable: {str(e)}", "warning")
+                self.stopping.wait(self.IDLE_POLL_SECONDS * 5)
+                continue
+            if payload is None:
+                self.stopping.wait(self.IDLE_POLL_SECONDS)
+                continue
+                
+            job = dict(payload, title=payload.get('title') or payload['url'])
+            with self.lock:
+                self.active[job['queue_id']] = job
+            self.engine.submit_batch([job], self._run_job, on_job_done=self._on_job_done)
             
-            # Text colors
-            'text_primary': '#FFFFFF',         # Pure white
-            'text_secondary': '#EBEBF5',       # Light gray
-            'text_tertiary': '#8E8E93',        # Medium gray
-            'text_quaternary': '#48484A',      # Dark gray
+        self.engine.cancel_all()
+        deadline = time.monotonic() + 10
+        while self.active and time.monotonic() < deadline:
+            time.sleep(0.2)
+        self.stopped.set()
+        self.engine.shutdown()
+        self.fetcher.verifier.shutdown()
+        self.backend.close()
+        self.log("👋 Worker stopped", "info")
+        
+    def _local_path(self, path, base_dir):
+        # Workers may mount the shared library somewhere else than the submitting GUI
+        if not self.library_dir:
+            return path
+        return os.path.join(self.library_dir, os.path.relpath(path, base_dir))
+        
+    def _run_job(self, job):
+        """Fetch one leased track into the shared library and link its folder view (worker thread)"""
+        self.log(f"⬇️ Downloading {job['title'][:40]}...", "info")
+        library = MusicLibrary(self.library_dir or job['base_dir'])
+        
+        def link(track):
+            if not track:
+                return False
+            path = library.link_view(
+                track['id'], self._local_path(job['view_dir'], job['base_dir']), job['view_name'] or track['title']
+            )
+            job['track'] = track
+            job['file'] = os.path.basename(path)
+            return True
+        
+        return when_done(self.fetcher.fetch(library, job['url'], job.get('id'), job), link)
+        
+    def _on_job_done(self, job, ok):
+        """Report a finished job to the queue, or hand it back when this worker is stopping (worker thread)"""
+        with self.lock:
+            self.active.pop(job['queue_id'], None)
+        if job.get('cancelled'):
+            # Cancelled because of a lost lease or cancelled batch, unless we are stopping
+            if self.stopping.is_set():
+                self.backend.release(job['queue_id'], self.worker_id)
+            return
             
-            # Interactive elements
-            'border': '#38383A',               # Border color
-            'border_active': '#007AFF',        # Active border
-            'hover': '#2C2C2E',                # Hover state
-            'pressed': '#1C1C1E',              # Pressed state
+        result = {
+            'worker': self.worker_id,
+            'track_id': job['track']['id'] if ok else None,
+            'file': job.get('file'),
+            'error': job.get('error'),
+            'stderr': job.get('stderr')
+        }
+        try:
+            reported = self.backend.complete(job['queue_id'], self.worker_id, ok, result)
+        except Exception as e:
+            self.log(f"⚠️ Could not report {job['title'][:30]}: {str(e)}", "warning")
+            return
+        if not reported:
+            self.log(f"⚠️ Lease of {job['title'][:30]} was lost, result dropped", "warning")
+        elif ok:
+            self.log(f"✅ Completed: {job['title'][:30]}...", "success")
+        else:
+            self.log(f"❌ Failed: {job['title'][:30]}... {job.get('error') or ''}", "error")
             
-            # Gradients (for future use)
-            'gradient_start': '#007AFF',
-            'gradient_end': '#5856D6',
+    def _heartbeat_loop(self):
+        """Renew the leases of running jobs, cancelling those this worker lost"""
+        while not self.stopped.wait(self.LEASE_SECONDS / 3):
+            with self.lock:
+                jobs = list(self.active.values())
+            for job in jobs:
+                try:
+                    held = self.backend.heartbeat(job['queue_id'], self.worker_id, self.LEASE_SECONDS)
+                except Exception as e:
+                    self.log(f"⚠️ Heartbeat failed: {str(e)}", "warning")
+                    continue
+                if not held:
+                    self.log(f"⛔ Lost the lease of {job['title'][:30]}, cancelling", "warning")
+                    self.engine.cancel_job(job)
+
+LOG_DIR = os.path.join(APP_DATA_DIR, "logs")
+STDERR_EXCERPT_CHARS = 2000
+
+def stderr_excerpt(stderr):
+    """Last lines of a child's stderr, short enough for a log record"""
+    if not stderr:
+        return None
+    return stderr.strip()[-STDERR_EXCERPT_CHARS:] or None
+
+class StructuredLogWriter:
+    """JSON lines log written by a background thread, rotated by size into gzip files"""
+    
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backups=5, max_pending=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.records = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+        
+    def write(self, level, message, job=None, stage=None, stderr=None):
+        """Queue a record; never blocks, drops the record when the writer has fallen far behind"""
+        try:
+            self.records.put_nowait((time.time(), level, job, stage, message, stderr))
+        except queue.Full:
+            self.dropped += 1
+            
+    def close(self, timeout=2):
+        """Flush queued records and stop the writer"""
+        try:
+            self.records.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+        
+    def _write_loop(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = None
+        while True:
+            batch = [self.records.get()]
+            # Drain whatever else is waiting so a burst costs one flush
+            while batch[-1] is not None:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            lines = [self._format(record) for record in batch if record is not None]
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                lines.append(self._format((time.time(), "warning", None, "log", f"{dropped} log records dropped", None)))
+                
+            try:
+                for line in lines:
+                    if f is None:
+                        f = open(self.path, "ab")
+                        size = f.tell()
+                    data = line.encode("utf-8")
+                    f.write(data)
+                    size += len(data)
+                    if size >= self.max_bytes:
+                        f.close()
+                        f = None
+                        self._rotate()
+                if f is not None:
+                    f.flush()
+            except OSError:
+                # A full or vanished disk must not take the app down with it
+                if f is not None:
+                    f.close()
+                    f = None
+            if closing:
+                if f is not None:
+                    f.close()
+                return
+                
+    @staticmethod
+    def _format(record):
+        created, level, job, stage, message, stderr = record
+        entry = {
+            'ts': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(created)) + f".{int(created % 1 * 1000):03d}",
+            'level': level,
+            'job': job,
+            'stage': stage,
+            'message': message
         }
+        if stderr:
+            entry['stderr'] = stderr
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+        
+    def _rotate(self):
+        """Shift app.jsonl.1.gz .. .N.gz along and compress the full log into .1.gz"""
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}.gz"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}.gz")
+        with open(self.path, "rb") as source, gzip.open(f"{self.path}.1.gz.part", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.replace(f"{self.path}.1.gz.part", f"{self.path}.1.gz")
+        os.remove(self.path)
 
-class AnimationManager:
-    """Handle smooth animations and transitions"""
+class StallMonitor:
+    """Measures Tk event loop latency and records main thread stalls with their stacks"""
     
-    def __init__(self):
-        self.animations = {}
-        
-    def fade_in(self, widget, duration=300):
-        """Fade in animation"""
-        # Placeholder for fade animation
-        pass
-        
-    def slide_in(self, widget, direction="left", duration=300):
-        """Slide in animation"""
-        # Placeholder for slide animation
-        pass
+    def __init__(self, root, threshold_ms=200, interval_ms=100):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.latencies = []
+        self.stalls = []
+        self.profiler = None
+        self.running = False
+        self._main_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._expected = None
+        self._profiling = False
+    
+    def start(self):
+        self.running = True
+        self._last_beat = time.perf_counter()
+        self._expected = self._last_beat + self.interval
+        self.root.after(int(self.interval * 1000), self._beat)
+        threading.Thread(target=self._watch, daemon=True).start()
+    
+    def stop(self):
+        self.running = False
+    
+    def _beat(self):
+        """Heartbeat on the Tk loop; lateness is how long the loop was busy"""
+        now = time.perf_counter()
+        self.latencies.append(max(0.0, now - self._expected))
+        self._last_beat = now
+        self._expected = now + self.interval
+        if self.running:
+            self.root.after(int(self.interval * 1000), self._beat)
+    
+    def _watch(self):
+        """Watchdog thread: grab the main thread's stack while a stall is happening"""
+        stall = None
+        while self.running:
+            time.sleep(self.interval / 2)
+            blocked = time.perf_counter() - self._last_beat - self.interval
+            if blocked > self.threshold:
+                if stall is None:
+                    frame = sys._current_frames().get(self._main_thread)
+                    stall = {
+                        'started': time.time() - blocked,
+                        'stack': "".join(traceback.format_stack(frame)) if frame else ""
+                    }
+                    self.stalls.append(stall)
+                stall['duration'] = blocked
+            else:
+                stall = None
+    
+    def profile_methods(self, obj, names):
+        """Wrap hot methods of obj with cProfile and start tracing allocations"""
+        self.profiler = cProfile.Profile()
+        tracemalloc.start(10)
+        for name in names:
+            setattr(obj, name, self._profiled(getattr(obj, name)))
+    
+    def _profiled(self, method):
+        def wrapper(*args, **kwargs):
+            # Only the outermost main thread call is profiled, the profiler is not reentrant
+            if self._profiling or threading.get_ident() != self._main_thread:
+                return method(*args, **kwargs)
+            self._profiling = True
+            self.profiler.enable()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.profiler.disable()
+                self._profiling = False
+        return wrapper
+    
+    def report(self):
+        """Plain text summary of latencies, stalls, profile and allocations"""
+        lines = ["Event loop latency"]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+            lines.append(
+                f"  {len(ordered)} heartbeats, p50 {pick(0.5):.1f} ms, p95 {pick(0.95):.1f} ms, "
+                f"p99 {pick(0.99):.1f} ms, max {ordered[-1] * 1000:.1f} ms"
+            )
+        lines.append(f"\nStalls over {self.threshold * 1000:.0f} ms: {len(self.stalls)}")
+        for stall in sorted(self.stalls, key=lambda s: s.get('duration', 0), reverse=True)[:20]:
+            started = time.strftime("%H:%M:%S", time.localtime(stall['started']))
+            lines.append(f"\n--- {started}, {stall.get('duration', 0) * 1000:.0f} ms ---")
+            lines.append(stall['stack'].rstrip())
+        
+        if self.profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(30)
+            lines.append("\nProfile of wrapped methods (cumulative)")
+            lines.append(stream.getvalue().rstrip())
+        if tracemalloc.is_tracing():
+            lines.append("\nTop allocations")
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:15]:
+                lines.append(f"  {stat}")
+        return "\n".join(lines) + "\n"
+    
+    def dump(self, directory):
+        """Write the report to a timestamped file and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("diagnostics-%Y%m%d-%H%M%S.txt"))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return path
 
 class ModernDownloader:
     """Modern YouTube Music Downloader with fluent design"""
     
-    def __init__(self):
+    # Rows rendered at once in the playlist list; more are added on demand
+    PLAYLIST_PAGE_SIZE = 200
+    # Playlist entries per yt-dlp enumeration call, and calls run at once
+    PLAYLIST_LOAD_PAGE = 500
+    PLAYLIST_LOAD_WORKERS = 4
+    # Seconds each enumeration call may take; a load makes several
+    PLAYLIST_LOAD_TIMEOUT = 120
+    
+    # Song cards rendered in the multiple songs list; the rest are summarised
+    SONG_LIST_PAGE_SIZE = 100
+    
+    # Main thread hot paths wrapped by --profile
+    PROFILED_METHODS = ("_update_playlist_ui", "update_songs_list", "log_message")
+    
+    def __init__(self, diagnostics=False, profile=False):
         self.theme = ModernTheme()
         self.animation_manager = AnimationManager()
         self.optimizer = ThreadPoolExecutor(max_workers=4)
+        self.config = load_config()
+        self.download_engine = DownloadEngine(workers=tuned_setting(self.config, 'download_workers', 4))
+        self.download_engine.set_group_size(self.config.get('fetch_group_size', 1))
         self.music_urls = []
-        self.playlist_items = []
-        self.playlist_include_states = {}
+        self.music_ids = set()
+        self.embed_art = OggOpus is not None and Image is not None
+        self.cover_art = CoverArtCache(os.path.join(APP_DATA_DIR, "covers"))
+        self.thumbnails = ThumbnailLoader(os.path.join(APP_DATA_DIR, "thumbnails")) if Image is not None else None
+        self.thumbnail_rows = {}
+        self._thumbnail_pending = None
+        self.normalize_loudness = False
+        self.write_tags = OggOpus is not None
+        self.progress = ProgressAggregator()
+        self._progress_ticking = False
+        self.fetcher = TrackFetcher(
+            self.download_engine,
+            InfoJsonCache(os.path.join(APP_DATA_DIR, "info")),
+            StagingCopier(tuned_setting(self.config, 'copy_workers', 1)),
+            TrackVerifier(tuned_setting(self.config, 'verify_workers', 2)),
+            log=lambda message, level="info", **fields: self.root.after(0, lambda: self.log_message(message, level, **fields)),
+            on_progress=self.progress.update
+        )
+        self.optimizer.submit(self.fetcher.info_cache.prune)
+        self.log_writer = StructuredLogWriter(os.path.join(LOG_DIR, "app.jsonl"))
+        self.work_queue = None
+        self.remote_batches = {}
+        self._work_queue_polling = False
+        self.loudness = LoudnessAnalyzer(
+            os.path.join(APP_DATA_DIR, "loudness.json"),
+            tuned_setting(self.config, 'cpu_workers', None)
+        )
+        self._songs_list_pending = False
+        self.playlist_model = PlaylistModel()
+        self.playlist_rows = {}
+        self.playlist_row_pool = []
+        self.playlist_matches = []
+        self.playlist_render_limit = self.PLAYLIST_PAGE_SIZE
+        self._filter_pending = None
+        self.playlist_url = None
+        self.playlist_sessions = {}
+        self.active_session_id = None
+        self._session_labels = {}
+        self.multi_batch = None
+        self.library_index = None
         
         self.setup_window()
+        self.stall_monitor = None
+        if diagnostics or profile:
+            self.stall_monitor = StallMonitor(self.root)
+            if profile:
+                # Before the interface is built so its callbacks see the wrappers
+                self.stall_monitor.profile_methods(self, self.PROFILED_METHODS)
+            self.stall_monitor.start()
         self.create_modern_interface()
         self.check_dependencies()
         
@@ -264,120 +2949,374 @@ class ModernDownloader:
             font=ctk.CTkFont(size=16, weight="bold"),
             text_color=self.theme.colors['text_primary']
         )
-        status_title.pack(pady=(20, 15))
+        status_title.pack(pady=(20, 15))
+        
+        # Status cards container
+        status_container = ctk.CTkFrame(status_frame, fg_color="transparent")
+        status_container.pack(fill="x", padx=20, pady=(0, 20))
+        
+        # yt-dlp status card
+        ytdlp_card = ctk.CTkFrame(
+            status_container,
+            fg_color=self.theme.colors['bg_surface'],
+            corner_radius=10,
+            height=60
+        )
+        ytdlp_card.pack(fill="x", pady=(0, 8))
+        ytdlp_card.pack_propagate(False)
+        
+        ytdlp_content = ctk.CTkFrame(ytdlp_card, fg_color="transparent")
+        ytdlp_content.pack(expand=True, fill="both", padx=15, pady=10)
+        ytdlp_content.grid_columnconfigure(0, weight=1)
+        
+        self.ytdlp_status = ctk.CTkLabel(
+            ytdlp_content,
+            text="yt-dlp: Checking...",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary'],
+            anchor="w"
+        )
+        self.ytdlp_status.grid(row=0, column=0, sticky="ew")
+        
+        # FFmpeg status card
+        ffmpeg_card = ctk.CTkFrame(
+            status_container,
+            fg_color=self.theme.colors['bg_surface'],
+            corner_radius=10,
+            height=60
+        )
+        ffmpeg_card.pack(fill="x")
+        ffmpeg_card.pack_propagate(False)
+        
+        ffmpeg_content = ctk.CTkFrame(ffmpeg_card, fg_color="transparent")
+        ffmpeg_content.pack(expand=True, fill="both", padx=15, pady=10)
+        ffmpeg_content.grid_columnconfigure(0, weight=1)
+        
+        self.ffmpeg_status = ctk.CTkLabel(
+            ffmpeg_content,
+            text="FFmpeg: Checking...",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary'],
+            anchor="w"
+        )
+        self.ffmpeg_status.grid(row=0, column=0, sticky="ew")
+        
+    def create_settings_section(self, parent):
+        """Create modern settings section"""
+        settings_frame = ctk.CTkFrame(
+            parent,
+            fg_color=self.theme.colors['bg_card'],
+            corner_radius=16
+        )
+        settings_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        settings_title = ctk.CTkLabel(
+            settings_frame,
+            text="Download Settings",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=self.theme.colors['text_primary']
+        )
+        settings_title.pack(pady=(20, 15))
+        
+        # Location selector with modern design
+        location_container = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        location_container.pack(fill="x", padx=20, pady=(0, 20))
+        
+        location_label = ctk.CTkLabel(
+            location_container,
+            text="Save Location",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary']
+        )
+        location_label.pack(anchor="w", pady=(0, 8))
+        
+        location_input_frame = ctk.CTkFrame(location_container, fg_color="transparent")
+        location_input_frame.pack(fill="x")
+        location_input_frame.grid_columnconfigure(0, weight=1)
+        
+        self.location_entry = ctk.CTkEntry(
+            location_input_frame,
+            placeholder_text="Select download folder...",
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            border_color=self.theme.colors['border'],
+            text_color=self.theme.colors['text_primary'],
+            height=40,
+            corner_radius=10
+        )
+        self.location_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        
+        browse_btn = ctk.CTkButton(
+            location_input_frame,
+            text="Browse",
+            width=80,
+            height=40,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_teal'],
+            hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=10,
+            command=self.browse_location
+        )
+        browse_btn.grid(row=0, column=1)
+        
+        # Set default location
+        self.current_location = os.getcwd()
+        self.location_entry.insert(0, self.current_location)
+        
+        # Staging folder for partial downloads and transcodes
+        staging_container = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        staging_container.pack(fill="x", padx=20, pady=(0, 20))
+        
+        staging_label = ctk.CTkLabel(
+            staging_container,
+            text="Staging Folder",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary']
+        )
+        staging_label.pack(anchor="w", pady=(0, 8))
+        
+        staging_input_frame = ctk.CTkFrame(staging_container, fg_color="transparent")
+        staging_input_frame.pack(fill="x")
+        staging_input_frame.grid_columnconfigure(0, weight=1)
+        
+        self.staging_entry = ctk.CTkEntry(
+            staging_input_frame,
+            placeholder_text="Inside the library (default)",
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            border_color=self.theme.colors['border'],
+            text_color=self.theme.colors['text_primary'],
+            height=40,
+            corner_radius=10
+        )
+        self.staging_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        
+        staging_browse_btn = ctk.CTkButton(
+            staging_input_frame,
+            text="Browse",
+            width=80,
+            height=40,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_teal'],
+            hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=10,
+            command=self.browse_staging_location
+        )
+        staging_browse_btn.grid(row=0, column=1)
+        
+        staging_reset_btn = ctk.CTkButton(
+            staging_input_frame,
+            text="✕",
+            width=40,
+            height=40,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['bg_surface'],
+            hover_color=self.theme.colors['hover'],
+            text_color=self.theme.colors['text_secondary'],
+            corner_radius=10,
+            command=self.reset_staging_location
+        )
+        staging_reset_btn.grid(row=0, column=2, padx=(10, 0))
+        
+        # Shared work queue drained by other computers running --worker
+        work_queue_container = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        work_queue_container.pack(fill="x", padx=20, pady=(0, 20))
+        
+        work_queue_label = ctk.CTkLabel(
+            work_queue_container,
+            text="Work Queue",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary']
+        )
+        work_queue_label.pack(anchor="w", pady=(0, 8))
+        
+        work_queue_input_frame = ctk.CTkFrame(work_queue_container, fg_color="transparent")
+        work_queue_input_frame.pack(fill="x")
+        work_queue_input_frame.grid_columnconfigure(0, weight=1)
+        
+        self.work_queue_entry = ctk.CTkEntry(
+            work_queue_input_frame,
+            placeholder_text="Off - download on this computer",
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            border_color=self.theme.colors['border'],
+            text_color=self.theme.colors['text_primary'],
+            height=40,
+            corner_radius=10
+        )
+        self.work_queue_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
         
-        # Status cards container
-        status_container = ctk.CTkFrame(status_frame, fg_color="transparent")
-        status_container.pack(fill="x", padx=20, pady=(0, 20))
+        work_queue_browse_btn = ctk.CTkButton(
+            work_queue_input_frame,
+            text="Browse",
+            width=80,
+            height=40,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_teal'],
+            hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=10,
+            command=self.browse_work_queue
+        )
+        work_queue_browse_btn.grid(row=0, column=1)
         
-        # yt-dlp status card
-        ytdlp_card = ctk.CTkFrame(
-            status_container,
+        work_queue_reset_btn = ctk.CTkButton(
+            work_queue_input_frame,
+            text="✕",
+            width=40,
+            height=40,
+            font=ctk.CTkFont(size=12, weight="bold"),
             fg_color=self.theme.colors['bg_surface'],
+            hover_color=self.theme.colors['hover'],
+            text_color=self.theme.colors['text_secondary'],
             corner_radius=10,
-            height=60
+            command=self.reset_work_queue
         )
-        ytdlp_card.pack(fill="x", pady=(0, 8))
-        ytdlp_card.pack_propagate(False)
+        work_queue_reset_btn.grid(row=0, column=2, padx=(10, 0))
         
-        ytdlp_content = ctk.CTkFrame(ytdlp_card, fg_color="transparent")
-        ytdlp_content.pack(expand=True, fill="both", padx=15, pady=10)
-        ytdlp_content.grid_columnconfigure(0, weight=1)
+        # Worker pool and queue order
+        engine_container = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        engine_container.pack(fill="x", padx=20, pady=(0, 20))
+        engine_container.grid_columnconfigure((0, 1), weight=1)
         
-        self.ytdlp_status = ctk.CTkLabel(
-            ytdlp_content,
-            text="yt-dlp: Checking...",
+        workers_label = ctk.CTkLabel(
+            engine_container,
+            text="Parallel Downloads",
             font=ctk.CTkFont(size=13, weight="bold"),
-            text_color=self.theme.colors['text_secondary'],
-            anchor="w"
+            text_color=self.theme.colors['text_secondary']
         )
-        self.ytdlp_status.grid(row=0, column=0, sticky="ew")
+        workers_label.grid(row=0, column=0, sticky="w", pady=(0, 8))
         
-        # FFmpeg status card
-        ffmpeg_card = ctk.CTkFrame(
-            status_container,
+        policy_label = ctk.CTkLabel(
+            engine_container,
+            text="Queue Order",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary']
+        )
+        policy_label.grid(row=0, column=1, sticky="w", padx=(10, 0), pady=(0, 8))
+        
+        self.workers_var = ctk.StringVar(value=str(self.download_engine.workers))
+        workers_menu = ctk.CTkOptionMenu(
+            engine_container,
+            values=[str(n) for n in range(1, 9)],
+            variable=self.workers_var,
+            font=ctk.CTkFont(size=12),
             fg_color=self.theme.colors['bg_surface'],
-            corner_radius=10,
-            height=60
+            button_color=self.theme.colors['accent_teal'],
+            button_hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            command=self.change_worker_count
         )
-        ffmpeg_card.pack(fill="x")
-        ffmpeg_card.pack_propagate(False)
+        workers_menu.grid(row=1, column=0, sticky="ew")
         
-        ffmpeg_content = ctk.CTkFrame(ffmpeg_card, fg_color="transparent")
-        ffmpeg_content.pack(expand=True, fill="both", padx=15, pady=10)
-        ffmpeg_content.grid_columnconfigure(0, weight=1)
+        self.policy_var = ctk.StringVar(value=self.download_engine.policy)
+        policy_menu = ctk.CTkOptionMenu(
+            engine_container,
+            values=list(SCHEDULING_POLICIES),
+            variable=self.policy_var,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            button_color=self.theme.colors['accent_teal'],
+            button_hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            command=self.change_queue_policy
+        )
+        policy_menu.grid(row=1, column=1, sticky="ew", padx=(10, 0))
         
-        self.ffmpeg_status = ctk.CTkLabel(
-            ffmpeg_content,
-            text="FFmpeg: Checking...",
+        self.tags_var = ctk.BooleanVar(value=self.write_tags)
+        tags_switch = ctk.CTkSwitch(
+            engine_container,
+            text="Write tags",
+            variable=self.tags_var,
             font=ctk.CTkFont(size=13, weight="bold"),
             text_color=self.theme.colors['text_secondary'],
-            anchor="w"
+            progress_color=self.theme.colors['accent_primary'],
+            command=self.toggle_tags
         )
-        self.ffmpeg_status.grid(row=0, column=0, sticky="ew")
+        tags_switch.grid(row=2, column=1, sticky="w", padx=(10, 0), pady=(12, 0))
         
-    def create_settings_section(self, parent):
-        """Create modern settings section"""
-        settings_frame = ctk.CTkFrame(
-            parent,
-            fg_color=self.theme.colors['bg_card'],
-            corner_radius=16
+        self.cover_art_var = ctk.BooleanVar(value=self.embed_art)
+        cover_art_switch = ctk.CTkSwitch(
+            engine_container,
+            text="Embed cover art",
+            variable=self.cover_art_var,
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary'],
+            progress_color=self.theme.colors['accent_primary'],
+            command=self.toggle_cover_art
         )
-        settings_frame.pack(fill="x", padx=20, pady=(0, 20))
+        cover_art_switch.grid(row=2, column=0, sticky="w", pady=(12, 0))
         
-        settings_title = ctk.CTkLabel(
-            settings_frame,
-            text="Download Settings",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color=self.theme.colors['text_primary']
+        self.loudness_var = ctk.BooleanVar(value=self.normalize_loudness)
+        loudness_switch = ctk.CTkSwitch(
+            engine_container,
+            text="Loudness tags (ReplayGain)",
+            variable=self.loudness_var,
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary'],
+            progress_color=self.theme.colors['accent_primary'],
+            command=self.toggle_loudness
         )
-        settings_title.pack(pady=(20, 15))
-        
-        # Location selector with modern design
-        location_container = ctk.CTkFrame(settings_frame, fg_color="transparent")
-        location_container.pack(fill="x", padx=20, pady=(0, 20))
+        loudness_switch.grid(row=3, column=0, columnspan=2, sticky="w", pady=(12, 0))
         
-        location_label = ctk.CTkLabel(
-            location_container,
-            text="Save Location",
+        analysis_label = ctk.CTkLabel(
+            engine_container,
+            text="Analysis Workers",
             font=ctk.CTkFont(size=13, weight="bold"),
             text_color=self.theme.colors['text_secondary']
         )
-        location_label.pack(anchor="w", pady=(0, 8))
-        
-        location_input_frame = ctk.CTkFrame(location_container, fg_color="transparent")
-        location_input_frame.pack(fill="x")
-        location_input_frame.grid_columnconfigure(0, weight=1)
+        analysis_label.grid(row=4, column=0, sticky="w", pady=(12, 8))
         
-        self.location_entry = ctk.CTkEntry(
-            location_input_frame,
-            placeholder_text="Select download folder...",
+        self.analysis_workers_var = ctk.StringVar(value=str(self.loudness.workers))
+        analysis_menu = ctk.CTkOptionMenu(
+            engine_container,
+            values=[str(n) for n in range(1, max(os.cpu_count() or 2, 8) + 1)],
+            variable=self.analysis_workers_var,
             font=ctk.CTkFont(size=12),
             fg_color=self.theme.colors['bg_surface'],
-            border_color=self.theme.colors['border'],
+            button_color=self.theme.colors['accent_teal'],
+            button_hover_color=self.theme.colors['accent_secondary'],
             text_color=self.theme.colors['text_primary'],
-            height=40,
-            corner_radius=10
+            command=self.change_analysis_workers
         )
-        self.location_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        analysis_menu.grid(row=5, column=0, sticky="ew")
         
-        browse_btn = ctk.CTkButton(
-            location_input_frame,
-            text="Browse",
-            width=80,
-            height=40,
+        self.autotune_btn = ctk.CTkButton(
+            engine_container,
+            text="⚡ Auto-tune",
+            height=28,
             font=ctk.CTkFont(size=12, weight="bold"),
             fg_color=self.theme.colors['accent_teal'],
             hover_color=self.theme.colors['accent_secondary'],
             text_color=self.theme.colors['text_primary'],
-            corner_radius=10,
-            command=self.browse_location
+            corner_radius=8,
+            command=self.start_calibration
         )
-        browse_btn.grid(row=0, column=1)
+        self.autotune_btn.grid(row=5, column=1, sticky="ew", padx=(10, 0))
         
-        # Set default location
-        self.current_location = os.getcwd()
-        self.location_entry.insert(0, self.current_location)
+        group_label = ctk.CTkLabel(
+            engine_container,
+            text="Songs per yt-dlp Run",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary']
+        )
+        group_label.grid(row=6, column=0, sticky="w", pady=(12, 8))
+        
+        self.group_size_var = ctk.StringVar(value=str(self.download_engine.group_size))
+        group_menu = ctk.CTkOptionMenu(
+            engine_container,
+            values=["1", "4", "8", "16", "32"],
+            variable=self.group_size_var,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            button_color=self.theme.colors['accent_teal'],
+            button_hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            command=self.change_group_size
+        )
+        group_menu.grid(row=7, column=0, sticky="ew")
         
     def create_modern_content(self, parent):
         """Create modern main content area"""
@@ -485,6 +3424,35 @@ class ModernDownloader:
         )
         self.progress_info.grid(row=0, column=1, padx=20, pady=15, sticky="e")
         
+        # Engine controls
+        self.pause_btn = ctk.CTkButton(
+            log_header,
+            text="⏸ Pause",
+            width=80,
+            height=30,
+            font=ctk.CTkFont(size=11, weight="bold"),
+            fg_color=self.theme.colors['accent_warning'],
+            hover_color=self.theme.colors['accent_teal'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.toggle_pause
+        )
+        self.pause_btn.grid(row=0, column=2, padx=(10, 0), pady=15)
+        
+        cancel_all_btn = ctk.CTkButton(
+            log_header,
+            text="⛔ Cancel All",
+            width=100,
+            height=30,
+            font=ctk.CTkFont(size=11, weight="bold"),
+            fg_color=self.theme.colors['accent_error'],
+            hover_color=self.theme.colors['accent_pink'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.cancel_all_downloads
+        )
+        cancel_all_btn.grid(row=0, column=3, padx=(10, 0), pady=15)
+        
         # Clear button
         clear_btn = ctk.CTkButton(
             log_header,
@@ -498,7 +3466,7 @@ class ModernDownloader:
             corner_radius=8,
             command=self.clear_log
         )
-        clear_btn.grid(row=0, column=2, padx=(10, 20), pady=15)
+        clear_btn.grid(row=0, column=4, padx=(10, 20), pady=15)
         
         # Modern log content
         log_content = ctk.CTkFrame(
@@ -594,7 +3562,7 @@ class ModernDownloader:
         
         subtitle = ctk.CTkLabel(
             title_container,
-            text="Add up to 15 YouTube music URLs for batch download",
+            text="Add YouTube music URLs one by one or import a whole list for batch download",
             font=ctk.CTkFont(size=14),
             text_color=self.theme.colors['text_tertiary'],
             anchor="w"
@@ -626,7 +3594,7 @@ class ModernDownloader:
         # Modern URL input
         self.url_entry = ctk.CTkEntry(
             input_content,
-            placeholder_text="🔗 Paste YouTube music URL here...",
+            placeholder_text="🔗 Paste one or more YouTube music URLs here...",
             height=55,
             font=ctk.CTkFont(size=15),
             fg_color=self.theme.colors['bg_tertiary'],
@@ -662,12 +3630,43 @@ class ModernDownloader:
         
         self.url_counter = ctk.CTkLabel(
             controls_frame,
-            text="Songs: 0/15",
+            text="Songs: 0",
             font=ctk.CTkFont(size=14, weight="bold"),
             text_color=self.theme.colors['accent_primary']
         )
         self.url_counter.grid(row=0, column=0, sticky="w")
         
+        import_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
+        import_frame.grid(row=0, column=1, sticky="e", padx=(0, 10))
+        
+        paste_btn = ctk.CTkButton(
+            import_frame,
+            text="📋 Paste List",
+            width=110,
+            height=35,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_secondary'],
+            hover_color=self.theme.colors['accent_primary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.import_urls_from_clipboard
+        )
+        paste_btn.pack(side="left", padx=(0, 10))
+        
+        import_file_btn = ctk.CTkButton(
+            import_frame,
+            text="📄 Import File",
+            width=110,
+            height=35,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_secondary'],
+            hover_color=self.theme.colors['accent_primary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.import_urls_from_file
+        )
+        import_file_btn.pack(side="left")
+        
         clear_all_btn = ctk.CTkButton(
             controls_frame,
             text="Clear All",
@@ -834,6 +3833,77 @@ class ModernDownloader:
         )
         load_btn.grid(row=0, column=1)
         
+        # Loaded playlist sessions
+        sessions_frame = ctk.CTkFrame(url_content, fg_color="transparent")
+        sessions_frame.grid(row=2, column=0, sticky="ew", pady=(12, 0))
+        sessions_frame.grid_columnconfigure(4, weight=1)
+        
+        self.session_var = ctk.StringVar(value="No playlists loaded")
+        self.session_menu = ctk.CTkOptionMenu(
+            sessions_frame,
+            values=["No playlists loaded"],
+            variable=self.session_var,
+            width=260,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            button_color=self.theme.colors['accent_secondary'],
+            button_hover_color=self.theme.colors['accent_indigo'],
+            text_color=self.theme.colors['text_primary'],
+            command=lambda label: self.show_playlist_session(self._session_labels[label]) if label in self._session_labels else None
+        )
+        self.session_menu.grid(row=0, column=0, sticky="w")
+        
+        folder_btn = ctk.CTkButton(
+            sessions_frame,
+            text="📁 Folder",
+            width=90,
+            height=30,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_teal'],
+            hover_color=self.theme.colors['accent_secondary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.choose_session_folder
+        )
+        folder_btn.grid(row=0, column=1, padx=(10, 0))
+        
+        close_btn = ctk.CTkButton(
+            sessions_frame,
+            text="✕ Close",
+            width=80,
+            height=30,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_error'],
+            hover_color=self.theme.colors['accent_pink'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.close_playlist_session
+        )
+        close_btn.grid(row=0, column=2, padx=(10, 0))
+        
+        stop_btn = ctk.CTkButton(
+            sessions_frame,
+            text="⛔ Stop",
+            width=80,
+            height=30,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_warning'],
+            hover_color=self.theme.colors['accent_pink'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.stop_playlist_session
+        )
+        stop_btn.grid(row=0, column=3, padx=(10, 0))
+        
+        self.sessions_progress = ctk.CTkLabel(
+            sessions_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=self.theme.colors['text_tertiary'],
+            anchor="e"
+        )
+        self.sessions_progress.grid(row=0, column=4, sticky="ew", padx=(15, 0))
+        
         # Modern playlist content
         playlist_content = ctk.CTkFrame(
             self.playlist_tab,
@@ -907,6 +3977,71 @@ class ModernDownloader:
         )
         self.playlist_counter.grid(row=0, column=3, padx=20, sticky="e")
         
+        # Filter over the loaded playlist
+        filter_frame = ctk.CTkFrame(controls_content, fg_color="transparent")
+        filter_frame.grid(row=1, column=0, columnspan=4, sticky="ew", pady=(12, 0))
+        filter_frame.grid_columnconfigure(0, weight=1)
+        
+        self.playlist_filter_entry = ctk.CTkEntry(
+            filter_frame,
+            placeholder_text="🔎 Filter songs by title...",
+            height=36,
+            font=ctk.CTkFont(size=13),
+            fg_color=self.theme.colors['bg_tertiary'],
+            border_color=self.theme.colors['border'],
+            text_color=self.theme.colors['text_primary'],
+            placeholder_text_color=self.theme.colors['text_quaternary'],
+            corner_radius=10
+        )
+        self.playlist_filter_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.playlist_filter_entry.bind("<KeyRelease>", lambda e: self.schedule_playlist_filter())
+        
+        include_matching_btn = ctk.CTkButton(
+            filter_frame,
+            text="✓ Include Matching",
+            width=150,
+            height=36,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_success'],
+            hover_color=self.theme.colors['accent_primary'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=10,
+            command=lambda: self.set_matching_songs(True)
+        )
+        include_matching_btn.grid(row=0, column=1, padx=(0, 10))
+        
+        exclude_matching_btn = ctk.CTkButton(
+            filter_frame,
+            text="✗ Exclude Matching",
+            width=150,
+            height=36,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_error'],
+            hover_color=self.theme.colors['accent_pink'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=10,
+            command=lambda: self.set_matching_songs(False)
+        )
+        exclude_matching_btn.grid(row=0, column=2, padx=(0, 10))
+        
+        self.filter_counter = ctk.CTkLabel(
+            filter_frame,
+            text="",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=self.theme.colors['text_tertiary']
+        )
+        self.filter_counter.grid(row=0, column=3)
+        
+        self.makespan_label = ctk.CTkLabel(
+            controls_content,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=self.theme.colors['text_tertiary'],
+            anchor="w"
+        )
+        self.makespan_label.grid(row=2, column=0, columnspan=4, sticky="ew", pady=(10, 0))
+        self._makespan_pending = False
+        
         # Modern playlist items list
         self.playlist_list = ctk.CTkScrollableFrame(
             playlist_content,
@@ -917,11 +4052,68 @@ class ModernDownloader:
         )
         self.playlist_list.grid(row=1, column=0, sticky="nsew", padx=25, pady=(0, 20))
         self.playlist_list.grid_columnconfigure(0, weight=1)
+        self._watch_playlist_scroll()
+        
+        self.show_more_btn = ctk.CTkButton(
+            self.playlist_list,
+            text="Show more",
+            height=40,
+            font=ctk.CTkFont(size=13, weight="bold"),
+            fg_color=self.theme.colors['bg_surface'],
+            hover_color=self.theme.colors['hover'],
+            text_color=self.theme.colors['text_secondary'],
+            corner_radius=10,
+            command=self.show_more_playlist_rows
+        )
         
         # Modern download section
         download_section = ctk.CTkFrame(playlist_content, fg_color="transparent")
         download_section.grid(row=2, column=0, sticky="ew", padx=25, pady=(0, 25))
         
+        # Sync options
+        sync_frame = ctk.CTkFrame(download_section, fg_color="transparent")
+        sync_frame.pack(fill="x", pady=(0, 12))
+        sync_frame.grid_columnconfigure(2, weight=1)
+        
+        self.sync_mode_var = ctk.BooleanVar(value=False)
+        sync_switch = ctk.CTkSwitch(
+            sync_frame,
+            text="Sync mode (only new songs)",
+            variable=self.sync_mode_var,
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.theme.colors['text_secondary'],
+            progress_color=self.theme.colors['accent_primary']
+        )
+        sync_switch.grid(row=0, column=0, sticky="w")
+        
+        self.sync_removed_var = ctk.StringVar(value="Archive removed")
+        removed_menu = ctk.CTkOptionMenu(
+            sync_frame,
+            values=["Keep removed", "Archive removed", "Delete removed"],
+            variable=self.sync_removed_var,
+            width=160,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.theme.colors['bg_surface'],
+            button_color=self.theme.colors['accent_secondary'],
+            button_hover_color=self.theme.colors['accent_indigo'],
+            text_color=self.theme.colors['text_primary']
+        )
+        removed_menu.grid(row=0, column=1, padx=15, sticky="w")
+        
+        self.sync_all_btn = ctk.CTkButton(
+            sync_frame,
+            text="🔁 Sync All Playlists",
+            width=170,
+            height=35,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=self.theme.colors['accent_secondary'],
+            hover_color=self.theme.colors['accent_indigo'],
+            text_color=self.theme.colors['text_primary'],
+            corner_radius=8,
+            command=self.sync_all_playlists
+        )
+        self.sync_all_btn.grid(row=0, column=3, sticky="e")
+        
         self.playlist_download_btn = ctk.CTkButton(
             download_section,
             text="🚀 Download Selected Songs",
@@ -971,6 +4163,68 @@ class ModernDownloader:
             self.location_entry.insert(0, folder)
             self.log_message(f"📁 Download location updated: {folder}", "info")
             
+    def browse_staging_location(self):
+        """Pick a fast local folder for in-progress downloads"""
+        folder = filedialog.askdirectory(
+            title="Select Staging Folder",
+            initialdir=self.fetcher.staging_location or tempfile.gettempdir()
+        )
+        if folder:
+            self.fetcher.staging_location = folder
+            self.staging_entry.delete(0, "end")
+            self.staging_entry.insert(0, folder)
+            self.log_message(f"📁 Staging folder updated: {folder}", "info")
+            
+    def reset_staging_location(self):
+        """Stage downloads inside the library again"""
+        self.fetcher.staging_location = None
+        self.staging_entry.delete(0, "end")
+        self.log_message("📁 Staging folder reset to the library", "info")
+        
+    def browse_work_queue(self):
+        """Pick a shared queue file that remote workers drain"""
+        path = filedialog.asksaveasfilename(
+            title="Select Work Queue File",
+            initialdir=self.current_location,
+            initialfile="work_queue.sqlite",
+            defaultextension=".sqlite",
+            confirmoverwrite=False,
+            filetypes=[("SQLite database", "*.sqlite *.db"), ("All files", "*.*")]
+        )
+        if path:
+            self.set_work_queue(path)
+            
+    def reset_work_queue(self):
+        """Download on this computer again"""
+        self.set_work_queue(None)
+        
+    def set_work_queue(self, spec):
+        """Open and remember the work queue new downloads are sent to, or None to download locally"""
+        work_queue = None
+        if spec:
+            try:
+                work_queue = open_work_queue(spec)
+            except Exception as e:
+                self.log_message(f"❌ Could not open work queue {spec}: {str(e)}", "error")
+                return
+                
+        # Open batches keep the queue they were submitted to
+        self.work_queue = work_queue
+        self.work_queue_entry.delete(0, "end")
+        if spec:
+            self.work_queue_entry.insert(0, spec)
+        if self.config.get('work_queue') != spec:
+            self.config['work_queue'] = spec
+            try:
+                save_config(self.config)
+            except OSError as e:
+                self.log_message(f"⚠️ Could not save settings: {str(e)}", "warning")
+                
+        if spec:
+            self.log_message(f"🌐 Downloads go to the work queue {spec}; run 'final.py --worker --queue {spec}' on each computer", "info")
+        else:
+            self.log_message("🌐 Work queue off, downloading on this computer", "info")
+            
     def format_duration(self, duration_str):
         """Format duration from seconds to H:MM:SS or MM:SS format"""
         if not duration_str or duration_str == "Unknown" or duration_str == "NA":
@@ -992,63 +4246,127 @@ class ModernDownloader:
             
     def validate_youtube_url(self, url):
         """Validate YouTube URL"""
-        youtube_patterns = [
-            r'youtube\.com/watch\?v=',
-            r'youtu\.be/',
-            r'music\.youtube\.com/watch\?v=',
-            r'youtube\.com/embed/',
-            r'm\.youtube\.com/watch\?v='
-        ]
-        return any(re.search(pattern, url) for pattern in youtube_patterns)
+        return song_id_from_url(url) is not None
         
     def add_music_url(self):
-        """Add music URL with modern validation feedback"""
-        url = self.url_entry.get().strip()
-        if not url:
+        """Add the URL (or URLs) typed in the entry with modern validation feedback"""
+        text = self.url_entry.get().strip()
+        if not text:
             self.log_message("⚠️ Please enter a URL", "warning")
             return
             
-        if len(self.music_urls) >= 15:
-            self.log_message("⚠️ Maximum 15 URLs allowed", "warning")
+        candidates = split_url_text(text)
+        if len(candidates) > 1:
+            self.url_entry.delete(0, "end")
+            self.import_song_urls(candidates, "entry")
             return
             
-        if not self.validate_youtube_url(url):
+        url = candidates[0]
+        video_id = song_id_from_url(url)
+        if video_id is None:
             self.log_message("❌ Please enter a valid YouTube/YouTube Music URL", "error")
             return
             
-        if any(item['url'] == url for item in self.music_urls):
-            self.log_message("⚠️ URL already added", "warning")
+        if video_id in self.music_ids:
+            self.log_message("⚠️ Song already added", "warning")
             return
             
-        # Add to list
-        music_item = {
-            'url': url,
-            'title': f"Song {len(self.music_urls) + 1}",
-            'index': len(self.music_urls),
-            'status': 'pending'
-        }
-        self.music_urls.append(music_item)
-        
-        # Clear entry and update UI
+        self._append_songs([(video_id, canonical_song_url(video_id))])
+        self.music_ids.add(video_id)
         self.url_entry.delete(0, "end")
+        self.log_message(f"✅ Added song {len(self.music_urls)}: {url[:50]}...", "success")
+        
+    def import_urls_from_clipboard(self):
+        """Import every URL currently on the clipboard"""
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            self.log_message("⚠️ Clipboard is empty", "warning")
+            return
+        self.import_song_urls(split_url_text(text), "clipboard")
+        
+    def import_urls_from_file(self):
+        """Import URLs from a text or CSV file"""
+        path = filedialog.askopenfilename(
+            title="Import Song URLs",
+            filetypes=[("URL lists", "*.txt *.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+            
+        try:
+            with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+                text = f.read()
+        except OSError as e:
+            self.log_message(f"❌ Could not read {os.path.basename(path)}: {e}", "error")
+            return
+            
+        candidates = split_url_csv(text) if path.lower().endswith('.csv') else split_url_text(text)
+        self.import_song_urls(candidates, os.path.basename(path))
+        
+    def import_song_urls(self, candidates, source):
+        """Add a list of URL candidates in one pass, deduplicated by video id"""
+        start = time.perf_counter()
+        accepted, duplicates, invalid = dedupe_song_urls(candidates, self.music_ids)
+        self._append_songs(accepted)
+        elapsed = time.perf_counter() - start
+        
+        level = "success" if accepted else "warning"
+        self.log_message(
+            f"📥 Imported from {source}: {len(accepted)} accepted, {duplicates} duplicates, "
+            f"{invalid} invalid ({elapsed * 1000:.0f} ms)",
+            level
+        )
+        
+    def _append_songs(self, accepted):
+        """Append (video_id, url) pairs to the song list and refresh the view"""
+        if not accepted:
+            return
+            
+        base = len(self.music_urls)
+        self.music_urls.extend(
+            {
+                'url': url,
+                'id': video_id,
+                'title': f"Song {base + i + 1}",
+                'index': base + i,
+                'status': 'pending'
+            }
+            for i, (video_id, url) in enumerate(accepted)
+        )
+        
         self.update_songs_list()
         self.update_url_counter()
+        self.multi_download_btn.configure(state="normal")
         
-        if self.music_urls:
-            self.multi_download_btn.configure(state="normal")
+    def schedule_songs_list_update(self):
+        """Coalesce song status refreshes from workers into one redraw"""
+        if not self._songs_list_pending:
+            self._songs_list_pending = True
+            self.root.after(100, self.update_songs_list)
             
-        self.log_message(f"✅ Added song {len(self.music_urls)}: {url[:50]}...", "success")
-        
     def update_songs_list(self):
         """Update songs list with modern cards"""
+        self._songs_list_pending = False
+        
         # Clear existing widgets
         for widget in self.songs_list.winfo_children():
             widget.destroy()
             
-        # Add each song
-        for i, song in enumerate(self.music_urls):
+        # Add a card for each song of the first page
+        for i, song in enumerate(self.music_urls[:self.SONG_LIST_PAGE_SIZE]):
             self.create_modern_song_item(song, i)
             
+        hidden = len(self.music_urls) - self.SONG_LIST_PAGE_SIZE
+        if hidden > 0:
+            more_label = ctk.CTkLabel(
+                self.songs_list,
+                text=f"… and {hidden} more songs",
+                font=ctk.CTkFont(size=13, weight="bold"),
+                text_color=self.theme.colors['text_tertiary']
+            )
+            more_label.grid(row=self.SONG_LIST_PAGE_SIZE, column=0, pady=12)
+            
     def create_modern_song_item(self, song, index):
         """Create modern song item card"""
         item_frame = ctk.CTkFrame(
@@ -1105,7 +4423,8 @@ class ModernDownloader:
             'pending': self.theme.colors['text_tertiary'],
             'downloading': self.theme.colors['accent_warning'],
             'completed': self.theme.colors['accent_success'],
-            'failed': self.theme.colors['accent_error']
+            'failed': self.theme.colors['accent_error'],
+            'cancelled': self.theme.colors['accent_warning']
         }
         
         status_label = ctk.CTkLabel(
@@ -1128,14 +4447,26 @@ class ModernDownloader:
             hover_color=self.theme.colors['accent_pink'],
             text_color=self.theme.colors['text_primary'],
             corner_radius=22,
-            command=lambda idx=index: self.remove_song_url(idx)
+            command=lambda idx=index: self.cancel_or_remove_song(idx)
         )
         remove_btn.grid(row=0, column=2, padx=15, pady=15)
         
+    def cancel_or_remove_song(self, index):
+        """Cancel a queued or running song, otherwise remove it from the list"""
+        if 0 <= index < len(self.music_urls):
+            job = self.music_urls[index].get('job')
+            if job and self.download_engine.cancel_job(job):
+                self.log_message(f"⛔ Cancelling song {index + 1}", "warning")
+                return
+        self.remove_song_url(index)
+        
     def remove_song_url(self, index):
         """Remove song URL with modern feedback"""
         if 0 <= index < len(self.music_urls):
             removed = self.music_urls.pop(index)
+            self.music_ids.discard(removed['id'])
+            for i, song in enumerate(self.music_urls[index:], index):
+                song['index'] = i
             self.update_songs_list()
             self.update_url_counter()
             
@@ -1149,6 +4480,7 @@ class ModernDownloader:
         if self.music_urls:
             count = len(self.music_urls)
             self.music_urls.clear()
+            self.music_ids.clear()
             self.update_songs_list()
             self.update_url_counter()
             self.multi_download_btn.configure(state="disabled")
@@ -1157,19 +4489,16 @@ class ModernDownloader:
     def update_url_counter(self):
         """Update URL counter with modern color coding"""
         count = len(self.music_urls)
-        self.url_counter.configure(text=f"Songs: {count}/15")
+        self.url_counter.configure(text=f"Songs: {count}")
         
         if count == 0:
             color = self.theme.colors['text_tertiary']
-        elif count < 10:
+        elif count <= self.SONG_LIST_PAGE_SIZE:
             color = self.theme.colors['accent_success']
-        elif count < 15:
-            color = self.theme.colors['accent_warning']
         else:
-            color = self.theme.colors['accent_error']
+            color = self.theme.colors['accent_warning']
             
         self.url_counter.configure(text_color=color)
-        
     def load_playlist(self):
         """Load playlist with modern feedback"""
         url = self.playlist_url_entry.get().strip()
@@ -1193,83 +4522,230 @@ class ModernDownloader:
         try:
             self.root.after(0, lambda: self.progress_bar.set(0.3))
             
-            cmd = [
-                "yt-dlp",
-                "--flat-playlist",
-                "--print", "%(title)s|%(id)s|%(url)s|%(duration)s",
-                "--no-warnings",
-                url
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            
-            self.root.after(0, lambda: self.progress_bar.set(0.7))
+            playlist_title, model = self._fetch_playlist_entries(url)
+            search_index = TitleSearchIndex(model.titles)
+            self._refresh_library_index()
             
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                playlist_items = []
-                
-                for i, line in enumerate(lines):
-                    if '|' in line and line.strip():
-                        parts = line.split('|')
-                        if len(parts) >= 3:
-                            title = parts[0] if parts[0] != 'NA' else f"Song {i+1}"
-                            video_id = parts[1]
-                            video_url = parts[2]
-                            duration = parts[3] if len(parts) > 3 and parts[3] != 'NA' else "Unknown"
-                            
-                            formatted_duration = self.format_duration(duration)
-                            
-                            playlist_items.append({
-                                'title': title,
-                                'id': video_id,
-                                'url': video_url,
-                                'duration': formatted_duration,
-                                'index': i,
-                                'included': True
-                            })
-                
-                self.root.after(0, lambda: self.progress_bar.set(1.0))
-                self.root.after(0, self._update_playlist_ui, playlist_items)
-            else:
-                error_msg = result.stderr or "Unknown error occurred"
-                self.root.after(0, self.log_message, f"❌ Failed to load playlist: {error_msg}", "error")
-                self.root.after(0, self._reset_playlist_ui)
+            self.root.after(0, lambda: self.progress_bar.set(1.0))
+            self.root.after(0, self._update_playlist_ui, model, url, playlist_title, search_index)
                 
+        except RuntimeError as e:
+            self.root.after(0, self.log_message, f"❌ Failed to load playlist: {e}", "error")
+            self.root.after(0, self._reset_playlist_ui)
         except subprocess.TimeoutExpired:
-            self.root.after(0, self.log_message, "⏱️ Playlist loading timed out (60s)", "error")
+            self.root.after(
+                0, self.log_message,
+                f"⏱️ Playlist loading timed out: a yt-dlp call took over {self.PLAYLIST_LOAD_TIMEOUT}s", "error"
+            )
             self.root.after(0, self._reset_playlist_ui)
         except Exception as e:
             self.root.after(0, self.log_message, f"❌ Error loading playlist: {str(e)}", "error")
             self.root.after(0, self._reset_playlist_ui)
             
-    def _update_playlist_ui(self, playlist_items):
-        """Update playlist UI with modern design"""
-        self.playlist_items = playlist_items
-        self.playlist_include_states = {item['index']: True for item in playlist_items}
+    def _enumerate_playlist(self, url, items=None):
+        """One flat yt-dlp enumeration; returns (title, total count or None, [(id, title, seconds)])"""
+        cmd = [
+            "yt-dlp",
+            "--flat-playlist",
+            "--print", "%(id)s|%(duration)s|%(title)s",
+            "--print", "playlist:#PLAYLIST#|%(playlist_count)s|%(title)s",
+            "--no-warnings"
+        ]
+        if items:
+            cmd += ["--playlist-items", items]
+        cmd.append(url)
         
-        # Clear existing items
-        for widget in self.playlist_list.winfo_children():
-            widget.destroy()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.PLAYLIST_LOAD_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr or "Unknown error occurred")
+            
+        playlist_title = None
+        count = None
+        entries = []
+        for line in result.stdout.strip().split('\n'):
+            if line.startswith("#PLAYLIST#|"):
+                _, count_text, title = (line.split('|', 2) + [""])[:3]
+                playlist_title = title.strip() or None
+                count = int(count_text) if count_text.isdigit() else None
+                continue
+            parts = line.split('|', 2)
+            if len(parts) == 3 and parts[0]:
+                try:
+                    duration_seconds = int(float(parts[1]))
+                except ValueError:
+                    duration_seconds = None
+                entries.append((parts[0], parts[2] if parts[2] != 'NA' else None, duration_seconds))
+        return playlist_title, count, entries
+        
+    def _fetch_playlist_entries(self, url):
+        """Enumerate a playlist page by page in parallel and return its title and items"""
+        page = self.PLAYLIST_LOAD_PAGE
+        playlist_title, count, first = self._enumerate_playlist(url, f"1:{page}")
+        pages = [first]
+        
+        if len(first) >= page:
+            if count and count > page:
+                # The first page told us the size, fetch the other slices concurrently
+                ranges = [f"{start}:{min(start + page - 1, count)}" for start in range(page + 1, count + 1, page)]
+                with ThreadPoolExecutor(max_workers=self.PLAYLIST_LOAD_WORKERS) as pool:
+                    futures = [pool.submit(self._enumerate_playlist_slice, url, items) for items in ranges]
+                    pages += [future.result() for future in futures]
+            elif not count:
+                # Size unknown: read the rest in one sequential pass
+                pages.append(self._enumerate_playlist(url, f"{page + 1}:")[2])
+                
+        model = PlaylistModel()
+        seen = set()
+        for entries in pages:
+            for video_id, title, duration_seconds in entries:
+                if video_id in seen:
+                    continue
+                seen.add(video_id)
+                model.append(video_id, title or f"Song {len(model) + 1}", duration_seconds)
+        return playlist_title, model
+        
+    def _enumerate_playlist_slice(self, url, items):
+        """Entries of one --playlist-items slice, retried once"""
+        try:
+            return self._enumerate_playlist(url, items)[2]
+        except (RuntimeError, subprocess.TimeoutExpired):
+            return self._enumerate_playlist(url, items)[2]
             
-        # Add each item
-        for item in playlist_items:
-            self.create_modern_playlist_item(item)
+    def _update_playlist_ui(self, model, url=None, title=None, search_index=None):
+        """Add or refresh a playlist session and show it"""
+        match = PLAYLIST_ID_PATTERN.search(url or "")
+        session_id = match.group(1) if match else (url or f"playlist-{len(self.playlist_sessions) + 1}")
+        session = self.playlist_sessions.get(session_id)
+        
+        if session is None:
+            name = title or session_id
+            output_dir = os.path.join(self.current_location, "YouTube_Music_Playlists", MusicLibrary.safe_filename(name))
+            if match:
+                # A playlist synced before keeps the folder its view files are in
+                snapshot = PlaylistSnapshots(MusicLibrary(self.current_location)).load(session_id)
+                output_dir = snapshot.get('output_dir') or output_dir
+            session = {
+                'id': session_id,
+                'url': url,
+                'title': name,
+                'output_dir': output_dir,
+                'batch': None
+            }
+            self.playlist_sessions[session_id] = session
+        session['model'] = model
+        session['search_index'] = search_index
+        
+        self.show_playlist_session(session_id)
+        
+        self.log_message(f"✅ Loaded {len(model)} songs from playlist", "success")
+        if len(model):
+            usage = model.memory_usage()
+            self.log_message(f"🧮 Playlist model: {usage / 1024:.0f} KB, {usage / len(model):.0f} bytes per song", "info")
+        if self.downloads_idle():
+            self.progress_info.configure(text="Ready")
+            self.progress_bar.set(0)
             
+    def show_playlist_session(self, session_id):
+        """Render one loaded playlist with its own selection"""
+        session = self.playlist_sessions[session_id]
+        self.active_session_id = session_id
+        self.playlist_model = session['model']
+        self.playlist_url = session['url']
+        
+        if session.get('search_index') is None:
+            session['search_index'] = TitleSearchIndex(self.playlist_model.titles)
+            
+        self.playlist_render_limit = self.PLAYLIST_PAGE_SIZE
+        self.apply_playlist_filter()
         self.update_playlist_counter()
-        self.playlist_download_btn.configure(state="normal")
-        
-        self.log_message(f"✅ Loaded {len(playlist_items)} songs from playlist", "success")
-        self.progress_info.configure(text="Ready")
-        self.progress_bar.set(0)
+        self.update_session_bar()
+        
+    def update_session_bar(self):
+        """Refresh the session picker, per-playlist progress and download button"""
+        self._session_labels = {}
+        for session in self.playlist_sessions.values():
+            label = session['title'][:40]
+            while label in self._session_labels:
+                label += "+"
+            self._session_labels[label] = session['id']
+            
+        labels = list(self._session_labels) or ["No playlists loaded"]
+        self.session_menu.configure(values=labels)
+        active_label = next((l for l, sid in self._session_labels.items() if sid == self.active_session_id), labels[0])
+        self.session_var.set(active_label)
+        
+        progress = []
+        for session in self.playlist_sessions.values():
+            batch = session['batch']
+            if batch:
+                progress.append(f"{session['title'][:20]} {batch['done']}/{batch['total']}")
+        self.sessions_progress.configure(text="  •  ".join(progress))
+        
+        session = self.playlist_sessions.get(self.active_session_id)
+        if session is None:
+            self.playlist_download_btn.configure(state="disabled", text="🚀 Download Selected Songs")
+        elif session['batch'] and session['batch']['done'] < session['batch']['total']:
+            self.playlist_download_btn.configure(state="disabled", text="Downloading...")
+        else:
+            self.playlist_download_btn.configure(state="normal", text="🚀 Download Selected Songs")
+            
+    def choose_session_folder(self):
+        """Pick the output folder of the active playlist"""
+        session = self.playlist_sessions.get(self.active_session_id)
+        if not session:
+            self.log_message("⚠️ Load a playlist first", "warning")
+            return
+            
+        folder = filedialog.askdirectory(
+            title=f"Output folder for {session['title']}",
+            initialdir=session['output_dir'] if os.path.isdir(session['output_dir']) else self.current_location
+        )
+        if folder:
+            session['output_dir'] = folder
+            self.log_message(f"📁 {session['title']} will be saved to: {folder}", "info")
+            
+    def stop_playlist_session(self):
+        """Cancel the queued and running downloads of the active playlist"""
+        session = self.playlist_sessions.get(self.active_session_id)
+        if not session or not session['batch']:
+            return
+            
+        if session['batch'].get('remote_id'):
+            self.optimizer.submit(self._cancel_remote_batch, session['batch'])
+            return
+            
+        count = self.download_engine.cancel_all(session['batch'])
+        if count:
+            self.log_message(f"⛔ Cancelling {count} downloads from {session['title']}", "warning")
+            
+    def close_playlist_session(self):
+        """Unload the active playlist; queued downloads still finish"""
+        session = self.playlist_sessions.pop(self.active_session_id, None)
+        if not session:
+            return
+            
+        self.log_message(f"🗑️ Closed playlist: {session['title']}", "info")
+        if self.playlist_sessions:
+            self.show_playlist_session(next(reversed(self.playlist_sessions)))
+            return
+            
+        self.active_session_id = None
+        self.playlist_model = PlaylistModel()
+        self.playlist_url = None
+        self.apply_playlist_filter()
+        self.update_playlist_counter()
+        self.makespan_label.configure(text="")
+        self.update_session_bar()
         
     def _reset_playlist_ui(self):
         """Reset playlist UI on error"""
         self.progress_info.configure(text="Ready")
         self.progress_bar.set(0)
         
-    def create_modern_playlist_item(self, item):
-        """Create modern playlist item card"""
+    def create_modern_playlist_item(self, slot):
+        """Create a reusable playlist item card for one list slot"""
+        row = {'index': None}
+        
         item_frame = ctk.CTkFrame(
             self.playlist_list,
             fg_color=self.theme.colors['bg_surface'],
@@ -1278,14 +4754,14 @@ class ModernDownloader:
             border_width=1,
             border_color=self.theme.colors['border']
         )
-        item_frame.grid(row=item['index'], column=0, sticky="ew", pady=6)
+        item_frame.grid(row=slot, column=0, sticky="ew", pady=6)
         item_frame.grid_propagate(False)
-        item_frame.grid_columnconfigure(1, weight=1)
+        item_frame.grid_columnconfigure(2, weight=1)
         
         # Modern toggle button
         toggle_frame = ctk.CTkFrame(
             item_frame,
-            fg_color=self.theme.colors['accent_primary'] if item['included'] else self.theme.colors['bg_tertiary'],
+            fg_color=self.theme.colors['accent_primary'],
             corner_radius=12,
             width=70,
             height=70
@@ -1295,46 +4771,50 @@ class ModernDownloader:
         
         toggle_btn = ctk.CTkButton(
             toggle_frame,
-            text="✓" if item['included'] else "✗",
+            text="✓",
             width=60,
             height=60,
             font=ctk.CTkFont(size=20, weight="bold"),
             fg_color="transparent",
             hover_color=self.theme.colors['hover'],
-            text_color=self.theme.colors['text_primary'] if item['included'] else self.theme.colors['text_tertiary'],
+            text_color=self.theme.colors['text_primary'],
             corner_radius=10,
-            command=lambda idx=item['index']: self.toggle_song_inclusion(idx)
+            command=lambda: self.toggle_song_inclusion(row['index'])
         )
         toggle_btn.pack(expand=True, padx=5, pady=5)
         
-        # Store references
-        item['toggle_frame'] = toggle_frame
-        item['toggle_btn'] = toggle_btn
+        # Thumbnail, filled in lazily while the row is on screen
+        thumbnail_label = ctk.CTkLabel(
+            item_frame,
+            text="🎵",
+            width=ThumbnailLoader.SIZE,
+            height=ThumbnailLoader.SIZE,
+            font=ctk.CTkFont(size=20),
+            fg_color=self.theme.colors['bg_tertiary'],
+            text_color=self.theme.colors['text_quaternary'],
+            corner_radius=8
+        )
+        thumbnail_label.grid(row=0, column=1, pady=15)
         
         # Song info with modern layout
         info_frame = ctk.CTkFrame(item_frame, fg_color="transparent")
-        info_frame.grid(row=0, column=1, sticky="ew", padx=15, pady=15)
+        info_frame.grid(row=0, column=2, sticky="ew", padx=15, pady=15)
         info_frame.grid_columnconfigure(0, weight=1)
         
         # Title with modern typography
-        title_text = item['title']
-        if len(title_text) > 55:
-            title_text = title_text[:55] + "..."
-            
         title_label = ctk.CTkLabel(
             info_frame,
-            text=title_text,
+            text="",
             font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=self.theme.colors['text_primary'] if item['included'] else self.theme.colors['text_tertiary'],
+            text_color=self.theme.colors['text_primary'],
             anchor="w"
         )
         title_label.grid(row=0, column=0, sticky="ew")
         
         # Details
-        details_text = f"ID: {item['id']}"
         details_label = ctk.CTkLabel(
             info_frame,
-            text=details_text,
+            text="",
             font=ctk.CTkFont(size=11),
             text_color=self.theme.colors['text_quaternary'],
             anchor="w"
@@ -1344,104 +4824,275 @@ class ModernDownloader:
         # Duration with modern styling
         duration_label = ctk.CTkLabel(
             info_frame,
-            text=f"⏱️ {item['duration']}",
+            text="",
             font=ctk.CTkFont(size=12, weight="bold"),
-            text_color=self.theme.colors['accent_teal'] if item['included'] else self.theme.colors['text_quaternary'],
+            text_color=self.theme.colors['accent_teal'],
             anchor="w"
         )
         duration_label.grid(row=2, column=0, sticky="ew")
         
-        # Store references
-        item['title_label'] = title_label
-        item['details_label'] = details_label
-        item['duration_label'] = duration_label
-        
         # Modern index
         index_label = ctk.CTkLabel(
             item_frame,
-            text=f"#{item['index'] + 1}",
+            text="",
             font=ctk.CTkFont(size=13, weight="bold"),
             text_color=self.theme.colors['accent_primary'],
             width=60
         )
-        index_label.grid(row=0, column=2, padx=15, pady=15)
+        index_label.grid(row=0, column=3, padx=15, pady=15)
+        
+        # Widget handles live in the view, not in the model
+        row.update({
+            'frame': item_frame,
+            'toggle_frame': toggle_frame,
+            'toggle_btn': toggle_btn,
+            'thumbnail_label': thumbnail_label,
+            'thumbnail_id': None,
+            'title_label': title_label,
+            'details_label': details_label,
+            'duration_label': duration_label,
+            'index_label': index_label
+        })
+        return row
+        
+    def _bind_playlist_row(self, row, index):
+        """Point a pooled row at a playlist entry"""
+        model = self.playlist_model
+        row['index'] = index
+        
+        title_text = model.titles[index]
+        if len(title_text) > 55:
+            title_text = title_text[:55] + "..."
+        duration = model.duration(index)
+        
+        row['title_label'].configure(text=title_text)
+        row['details_label'].configure(text=f"ID: {model.ids[index]}")
+        row['duration_label'].configure(text=f"⏱️ {self.format_duration(duration) if duration is not None else 'Unknown'}")
+        row['index_label'].configure(text=f"#{index + 1}")
+        self.playlist_rows[index] = row
+        self.refresh_playlist_row(index)
+        self._bind_thumbnail(row, model.ids[index])
+        
+    def _bind_thumbnail(self, row, video_id):
+        """Show a row's thumbnail from memory, or the placeholder until it is loaded"""
+        if row['thumbnail_id'] == video_id:
+            return
+        if self.thumbnail_rows.get(row['thumbnail_id']) is row:
+            del self.thumbnail_rows[row['thumbnail_id']]
+        row['thumbnail_id'] = video_id
+        self.thumbnail_rows[video_id] = row
+        image = self.thumbnails.get(video_id) if self.thumbnails else None
+        if image is not None:
+            row['thumbnail_label'].configure(image=image, text="")
+        else:
+            row['thumbnail_label'].configure(image=None, text="🎵")
+            
+    def _watch_playlist_scroll(self):
+        """Load thumbnails whenever the playlist list scrolls or resizes"""
+        # CTkScrollableFrame has no scroll event, so wrap the canvas's scrollbar callback
+        canvas = self.playlist_list._parent_canvas
+        set_scrollbar = self.playlist_list._scrollbar.set
+        
+        def on_scroll(first, last):
+            set_scrollbar(first, last)
+            self.schedule_thumbnail_update()
+        canvas.configure(yscrollcommand=on_scroll)
+        
+    def schedule_thumbnail_update(self):
+        """Debounce scrolling so a fling triggers one visibility pass"""
+        if self.thumbnails is None or self._thumbnail_pending:
+            return
+        self._thumbnail_pending = self.root.after(80, self._update_visible_thumbnails)
+        
+    def _update_visible_thumbnails(self):
+        """Request thumbnails for rows in view and cancel those scrolled away"""
+        self._thumbnail_pending = None
+        rows = [row for row in self.playlist_row_pool if row['index'] is not None]
+        if not self.playlist_list.winfo_ismapped():
+            # Another tab is showing; the first scroll callback after it returns brings us back
+            return
+        if not rows:
+            self.thumbnails.cancel_except(set())
+            return
+            
+        # Rows share one height, so the view maps straight onto slots
+        canvas = self.playlist_list._parent_canvas
+        top = canvas.canvasy(0)
+        bottom = top + canvas.winfo_height()
+        first_y = rows[0]['frame'].winfo_y()
+        pitch = rows[1]['frame'].winfo_y() - first_y if len(rows) > 1 else rows[0]['frame'].winfo_height()
+        if pitch <= 0:
+            # Not laid out yet
+            self.schedule_thumbnail_update()
+            return
+        # One screen of rows either side is fetched ahead
+        span = bottom - top
+        start = max(0, int((top - span - first_y) // pitch))
+        end = min(len(rows), int((bottom + span - first_y) // pitch) + 1)
+        
+        wanted = {row['thumbnail_id'] for row in rows[start:end]}
+        self.thumbnails.cancel_except(wanted)
+        for video_id in wanted:
+            if self.thumbnails.get(video_id) is None:
+                self.thumbnails.request(video_id, self._on_thumbnail_loaded)
+                
+    def _on_thumbnail_loaded(self, video_id, image):
+        """Hand a decoded thumbnail to the main thread (pool thread)"""
+        self.root.after(0, self._show_thumbnail, video_id, image)
+        
+    def _show_thumbnail(self, video_id, image):
+        """Wrap a decoded thumbnail for Tk, cache it and show it if its row is still bound"""
+        size = ThumbnailLoader.SIZE
+        ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=(size, size))
+        # The PIL image plus the scaled PhotoImage CTkImage keeps per scaling
+        self.thumbnails.remember(video_id, ctk_image, image.width * image.height * 3 + size * size * 8)
+        row = self.thumbnail_rows.get(video_id)
+        if row is not None and row['thumbnail_id'] == video_id:
+            row['thumbnail_label'].configure(image=ctk_image, text="")
+        
+    def _render_playlist_rows(self):
+        """Show the current page of matching entries, reusing row widgets"""
+        visible = self.playlist_matches[:self.playlist_render_limit]
+        self.playlist_rows = {}
+        
+        for slot, index in enumerate(visible):
+            if slot == len(self.playlist_row_pool):
+                self.playlist_row_pool.append(self.create_modern_playlist_item(slot))
+            row = self.playlist_row_pool[slot]
+            self._bind_playlist_row(row, index)
+            row['frame'].grid()
+            
+        for row in self.playlist_row_pool[len(visible):]:
+            row['index'] = None
+            row['frame'].grid_remove()
+        self.schedule_thumbnail_update()
+            
+        remaining = len(self.playlist_matches) - len(visible)
+        if remaining > 0:
+            self.show_more_btn.configure(text=f"Show more ({remaining} not shown)")
+            self.show_more_btn.grid(row=len(self.playlist_row_pool) + 1, column=0, sticky="ew", pady=6)
+        else:
+            self.show_more_btn.grid_remove()
+            
+    def show_more_playlist_rows(self):
+        """Render the next page of matching entries"""
+        self.playlist_render_limit += self.PLAYLIST_PAGE_SIZE
+        self._render_playlist_rows()
+        
+    def schedule_playlist_filter(self):
+        """Debounce filter typing so fast typists trigger one search"""
+        if self._filter_pending:
+            self.root.after_cancel(self._filter_pending)
+        self._filter_pending = self.root.after(60, self.apply_playlist_filter)
+        
+    def apply_playlist_filter(self):
+        """Look the filter text up in the title index and show the matches"""
+        self._filter_pending = None
+        session = self.playlist_sessions.get(self.active_session_id)
+        query = self.playlist_filter_entry.get().strip()
+        
+        if session is None:
+            self.playlist_matches = []
+        elif query:
+            self.playlist_matches = session['search_index'].search(query)
+        else:
+            self.playlist_matches = list(range(len(self.playlist_model)))
+            
+        self.playlist_render_limit = self.PLAYLIST_PAGE_SIZE
+        self._render_playlist_rows()
+        
+        if session is not None and query:
+            self.filter_counter.configure(text=f"{len(self.playlist_matches)} matching")
+        else:
+            self.filter_counter.configure(text="")
+            
+    def set_matching_songs(self, value):
+        """Include or exclude every entry matching the filter in one step"""
+        if not self.playlist_filter_entry.get().strip():
+            self.log_message("⚠️ Type a filter first", "warning")
+            return
+            
+        changed = self.playlist_model.set_many(self.playlist_matches, value)
+        self._refresh_all_rows()
+        action = "Included" if value else "Excluded"
+        self.log_message(f"{'✓' if value else '✗'} {action} {changed} matching songs", "info")
         
     def toggle_song_inclusion(self, index):
         """Toggle song inclusion with modern visual feedback"""
-        if index < len(self.playlist_items):
-            item = self.playlist_items[index]
-            item['included'] = not item['included']
-            self.playlist_include_states[index] = item['included']
-            
-            # Update visual state with modern colors
-            if item['included']:
-                item['toggle_frame'].configure(fg_color=self.theme.colors['accent_primary'])
-                item['toggle_btn'].configure(
-                    text="✓",
-                    text_color=self.theme.colors['text_primary']
-                )
-                item['title_label'].configure(text_color=self.theme.colors['text_primary'])
-                item['duration_label'].configure(text_color=self.theme.colors['accent_teal'])
-            else:
-                item['toggle_frame'].configure(fg_color=self.theme.colors['bg_tertiary'])
-                item['toggle_btn'].configure(
-                    text="✗",
-                    text_color=self.theme.colors['text_tertiary']
-                )
-                item['title_label'].configure(text_color=self.theme.colors['text_tertiary'])
-                item['duration_label'].configure(text_color=self.theme.colors['text_quaternary'])
-                
+        if index < len(self.playlist_model):
+            self.playlist_model.toggle(index)
+            self.refresh_playlist_row(index)
             self.update_playlist_counter()
             
+    def refresh_playlist_row(self, index):
+        """Restyle a rendered row after its selection changed"""
+        row = self.playlist_rows.get(index)
+        if row is None:
+            return
+            
+        # Update visual state with modern colors
+        if self.playlist_model.is_selected(index):
+            row['toggle_frame'].configure(fg_color=self.theme.colors['accent_primary'])
+            row['toggle_btn'].configure(
+                text="✓",
+                text_color=self.theme.colors['text_primary']
+            )
+            row['title_label'].configure(text_color=self.theme.colors['text_primary'])
+            row['duration_label'].configure(text_color=self.theme.colors['accent_teal'])
+        else:
+            row['toggle_frame'].configure(fg_color=self.theme.colors['bg_tertiary'])
+            row['toggle_btn'].configure(
+                text="✗",
+                text_color=self.theme.colors['text_tertiary']
+            )
+            row['title_label'].configure(text_color=self.theme.colors['text_tertiary'])
+            row['duration_label'].configure(text_color=self.theme.colors['text_quaternary'])
+            
+    def _refresh_all_rows(self):
+        for index in self.playlist_rows:
+            self.refresh_playlist_row(index)
+        self.update_playlist_counter()
+        
     def include_all_songs(self):
         """Include all songs in playlist"""
-        for item in self.playlist_items:
-            if not item['included']:
-                self.toggle_song_inclusion(item['index'])
+        self.playlist_model.set_all(True)
+        self._refresh_all_rows()
                 
     def exclude_all_songs(self):
         """Exclude all songs from playlist"""
-        for item in self.playlist_items:
-            if item['included']:
-                self.toggle_song_inclusion(item['index'])
+        self.playlist_model.set_all(False)
+        self._refresh_all_rows()
                 
     def invert_selection(self):
         """Invert current selection"""
-        for item in self.playlist_items:
-            self.toggle_song_inclusion(item['index'])
+        self.playlist_model.invert()
+        self._refresh_all_rows()
             
     def update_playlist_counter(self):
         """Update playlist counter with modern styling"""
-        if not self.playlist_items:
+        model = self.playlist_model
+        if not len(model):
             self.playlist_counter.configure(
                 text="No playlist loaded",
                 text_color=self.theme.colors['text_tertiary']
             )
             return
             
-        total = len(self.playlist_items)
-        included = sum(1 for item in self.playlist_items if item['included'])
-        
-        # Calculate total duration
-        total_seconds = 0
-        for item in self.playlist_items:
-            if item['included'] and item['duration'] != "Unknown":
-                try:
-                    duration_str = item['duration']
-                    parts = duration_str.split(':')
-                    if len(parts) == 3:
-                        total_seconds += int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                    elif len(parts) == 2:
-                        total_seconds += int(parts[0]) * 60 + int(parts[1])
-                except (ValueError, IndexError):
-                    pass
+        total = len(model)
+        included = model.selected_count
+        total_seconds = model.selected_seconds
         
         # Format display text
         if total_seconds > 0:
             total_duration = self.format_duration(str(total_seconds))
-            text = f"Will download: {included}/{total} songs • Total: {total_duration}"
+            size = format_size(estimate_output_bytes(total_seconds))
+            text = f"Will download: {included}/{total} songs • Total: {total_duration} (≈ {size})"
         else:
             text = f"Will download: {included}/{total} songs"
+            
+        if self.library_index and included:
+            have = self.library_index.count_present(model.ids[i] for i in model.selected_indices())
+            text += f" • Already have {have}/{included}"
         
         # Modern color coding
         if included == 0:
@@ -1451,128 +5102,903 @@ class ModernDownloader:
         else:
             color = self.theme.colors['accent_warning']
             
-        self.playlist_counter.configure(text=text, text_color=color)    
+        self.playlist_counter.configure(text=text, text_color=color)
+        self.schedule_makespan_preview()
+        
+    def schedule_makespan_preview(self):
+        """Coalesce preview updates so bulk toggles compute it once"""
+        if not self._makespan_pending:
+            self._makespan_pending = True
+            self.root.after(150, self.update_makespan_preview)
+            
+    def update_makespan_preview(self):
+        """Show the expected makespan of the selection for each queue policy"""
+        self._makespan_pending = False
+        # Jobs already waiting in the engine share the same workers
+        queued = [
+            {'duration': job.get('duration'), 'seq': n, 'group': job.get('group')}
+            for n, job in enumerate(self.download_engine.pending_jobs())
+        ]
+        model = self.playlist_model
+        selected = [
+            {'duration': model.duration(i), 'seq': len(queued) + i, 'group': 'selection'}
+            for i in model.selected_indices()
+        ]
+        if not selected:
+            self.makespan_label.configure(text="")
+            return
+            
+        workers = self.download_engine.workers
+        estimates = []
+        for name, policy in SCHEDULING_POLICIES.items():
+            makespan = estimate_makespan(policy(queued + selected), workers)
+            estimates.append(f"{name} {self.format_duration(str(int(makespan)))}")
+            
+        self.makespan_label.configure(
+            text=f"⏳ Estimated time with {workers} workers: " + "  •  ".join(estimates)
+        )
+        
+    def set_override(self, key, value):
+        """Remember a manual setting so it wins over calibration"""
+        self.config.setdefault('overrides', {})[key] = value
+        try:
+            save_config(self.config)
+        except OSError as e:
+            self.log_message(f"⚠️ Could not save settings: {str(e)}", "warning")
+            
+    def change_worker_count(self, value):
+        """Resize the shared download worker pool"""
+        self.download_engine.set_workers(int(value))
+        self.set_override('download_workers', int(value))
+        self.log_message(f"⚙️ Parallel downloads set to {value}", "info")
+        self.schedule_makespan_preview()
+        
+    def change_group_size(self, value):
+        """Set how many queued songs share one yt-dlp process"""
+        self.download_engine.set_group_size(int(value))
+        self.config['fetch_group_size'] = int(value)
+        try:
+            save_config(self.config)
+        except OSError as e:
+            self.log_message(f"⚠️ Could not save settings: {str(e)}", "warning")
+        if int(value) > 1:
+            self.log_message(f"⚙️ Up to {value} songs now share one yt-dlp run", "info")
+        else:
+            self.log_message("⚙️ Every song gets its own yt-dlp run", "info")
+        
+    def toggle_tags(self):
+        """Turn metadata tagging on or off"""
+        if self.tags_var.get() and OggOpus is None:
+            self.tags_var.set(False)
+            self.log_message("⚠️ Tagging needs mutagen: pip install mutagen", "warning")
+            return
+        self.write_tags = self.tags_var.get()
+        self.log_message(f"⚙️ Tagging {'on' if self.write_tags else 'off'}", "info")
+        
+    def toggle_cover_art(self):
+        """Turn the cover art stage on or off"""
+        if self.cover_art_var.get() and (OggOpus is None or Image is None):
+            self.cover_art_var.set(False)
+            self.log_message("⚠️ Cover art needs Pillow and mutagen: pip install Pillow mutagen", "warning")
+            return
+        self.embed_art = self.cover_art_var.get()
+        self.log_message(f"⚙️ Cover art {'on' if self.embed_art else 'off'}", "info")
+        
+    def change_analysis_workers(self, value):
+        """Resize the loudness analysis pool"""
+        self.loudness.set_workers(int(value))
+        self.set_override('cpu_workers', int(value))
+        self.log_message(f"⚙️ Analysis workers set to {value}", "info")
+        
+    def start_calibration(self):
+        """Measure this machine and pick worker counts in the background"""
+        self.autotune_btn.configure(state="disabled", text="Tuning...")
+        self.log_message("⚡ Measuring transcode, disk and network speed...", "info")
+        threading.Thread(target=self._calibration_thread, daemon=True).start()
+        
+    def _calibration_thread(self):
+        """Run the calibration probes (background thread)"""
+        calibrator = HardwareCalibrator(MusicLibrary(self.current_location).root, self.config.get('network_probe_url'))
+        results = calibrator.run(log=lambda message: self.root.after(0, self.log_message, message, "warning"))
+        self.root.after(0, self._apply_calibration, results)
+        
+    def _apply_calibration(self, results):
+        """Save calibration results and apply them, asking before replacing manual settings"""
+        self.config['calibration'] = results
+        overrides = self.config.get('overrides', {})
+        if overrides and messagebox.askyesno(
+            "Auto-tune",
+            f"Measured: {results['download_workers']} parallel downloads, {results['cpu_workers']} analysis workers.\n\n"
+            "Replace the values you set by hand with these?"
+        ):
+            overrides.clear()
+        try:
+            save_config(self.config)
+        except OSError as e:
+            self.log_message(f"⚠️ Could not save calibration: {str(e)}", "warning")
+            
+        download_workers = tuned_setting(self.config, 'download_workers', 4)
+        cpu_workers = tuned_setting(self.config, 'cpu_workers', results['cpu_workers'])
+        self.download_engine.set_workers(download_workers)
+        self.workers_var.set(str(download_workers))
+        self.loudness.set_workers(cpu_workers)
+        self.analysis_workers_var.set(str(cpu_workers))
+        self.fetcher.staging_copier = StagingCopier(results['copy_workers'])
+        self.schedule_makespan_preview()
+        
+        measured = ", ".join(
+            f"{label} {results[key]}" for key, label in (
+                ('transcode_speed', "transcode ×"), ('disk_mbps', "disk MB/s"), ('network_mbps', "network Mbit/s")
+            ) if key in results
+        )
+        self.log_message(f"⚡ Measured: {measured or 'nothing'}", "info")
+        self.log_message(
+            f"⚡ Tuned: {results['download_workers']} parallel downloads, "
+            f"{results['cpu_workers']} analysis workers, {results['copy_workers']} staging copies",
+            "success"
+        )
+        self.autotune_btn.configure(state="normal", text="⚡ Auto-tune")
+        
+    def toggle_loudness(self):
+        """Turn loudness analysis and gain tagging on or off"""
+        if self.loudness_var.get() and OggOpus is None:
+            self.loudness_var.set(False)
+            self.log_message("⚠️ Loudness tags need mutagen: pip install mutagen", "warning")
+            return
+        self.normalize_loudness = self.loudness_var.get()
+        self.log_message(f"⚙️ Loudness tags {'on' if self.normalize_loudness else 'off'}", "info")
+        
+    def change_queue_policy(self, policy):
+        """Switch the order in which queued songs are downloaded"""
+        self.download_engine.set_policy(policy)
+        self.log_message(f"⚙️ Queue order set to {policy}", "info")
     
+    def _watch_free_space(self, library):
+        """Point the engine's free space watermark at the staging and library drives"""
+        staging_root = self.fetcher.staging_root(library)
+        os.makedirs(staging_root, exist_ok=True)
+        self.download_engine.set_space_watermark(
+            [staging_root, library.root], FREE_SPACE_WATERMARK, self._on_space_wait
+        )
+        return staging_root
+        
+    def _on_space_wait(self, waiting):
+        """Report the engine holding or releasing jobs over free space (worker thread)"""
+        if waiting:
+            self.root.after(0, self.log_message, f"💾 Less than {format_size(FREE_SPACE_WATERMARK)} free, downloads on hold until space is freed", "warning")
+        else:
+            self.root.after(0, self.log_message, "💾 Disk space available again, resuming downloads", "success")
+            
+    def _preflight_space(self, library, songs):
+        """Check both drives can take the songs' estimated size; True to go ahead"""
+        staging_root = self._watch_free_space(library)
+        missing = [
+            seconds for video_id, seconds in songs
+            if not (video_id and self.library_index and self.library_index.has(video_id))
+        ]
+        needed = sum(estimate_output_bytes(seconds or DEFAULT_TRACK_SECONDS) for seconds in missing)
+        # Staging only ever holds the tracks in flight, source and converted copy
+        largest = max((seconds or DEFAULT_TRACK_SECONDS for seconds in missing), default=0)
+        staging_needed = 2 * estimate_output_bytes(largest) * self.download_engine.workers
+        
+        problems = []
+        for label, path, required in (("library", library.root, needed), ("staging", staging_root, staging_needed)):
+            try:
+                free = shutil.disk_usage(path).free
+            except OSError:
+                continue
+            if free - required < FREE_SPACE_WATERMARK:
+                problems.append(f"{label} drive: about {format_size(required)} needed, {format_size(free)} free")
+                
+        if not problems:
+            self.log_message(f"💾 Estimated download size: {format_size(needed)}", "info")
+            return True
+        for problem in problems:
+            self.log_message(f"💾 Low disk space on {problem}", "warning")
+        return messagebox.askyesno(
+            "Low disk space",
+            "\n".join(problems) + "\n\nDownloads will pause whenever free space drops below "
+            f"{format_size(FREE_SPACE_WATERMARK)}. Start anyway?"
+        )
+        
     def download_multiple_songs(self):
         """Download multiple songs with modern progress tracking"""
         if not self.music_urls:
             self.log_message("⚠️ No songs to download", "warning")
             return
             
+        library = MusicLibrary(self.current_location)
+        if not self._preflight_space(library, [(song['id'], None) for song in self.music_urls]):
+            return
+            
         self.log_message(f"🚀 Starting download of {len(self.music_urls)} songs...", "info")
         self.progress_info.configure(text="Downloading songs...")
         self.multi_download_btn.configure(state="disabled", text="Downloading...")
         
-        threading.Thread(target=self._download_multiple_thread, daemon=True).start()
+        download_dir = os.path.join(self.current_location, "YouTube_Music_Songs")
+        jobs = [
+            {
+                'library': library,
+                'url': song['url'],
+                'id': song['id'],
+                'title': song['title'],
+                'duration': None,
+                'position': i + 1,
+                'view_dir': download_dir,
+                'view_name': None,
+                'song': song
+            }
+            for i, song in enumerate(self.music_urls)
+        ]
+        for job in jobs:
+            job['song']['job'] = job
+        self.multi_batch = self._submit_download_jobs(
+            jobs,
+            lambda batch: self._on_download_batch_finished(batch, "Download complete")
+        )
         
-    def _download_multiple_thread(self):
-        """Download multiple songs in background with modern feedback"""
-        try:
-            download_dir = os.path.join(self.current_location, "YouTube_Music_Songs")
-            os.makedirs(download_dir, exist_ok=True)
+    def _submit_download_jobs(self, jobs, on_finish):
+        """Queue download jobs on the work queue when one is set, else on this computer"""
+        self.start_progress_updates(jobs)
+        if self.work_queue is None:
+            return self.download_engine.submit_batch(
+                jobs, self._run_download_job, on_job_done=self._on_download_job_done, on_finish=on_finish,
+                run_many=self._run_download_jobs
+            )
             
-            total = len(self.music_urls)
-            successful = 0
+        # Same shape as an engine batch so progress and session code need not care
+        batch = {
+            'jobs': jobs,
+            'total': len(jobs),
+            'done': 0,
+            'successful': 0,
+            'cancelled': 0,
+            'on_finish': on_finish,
+            'remote_id': uuid.uuid4().hex,
+            'queue': self.work_queue,
+            'queue_jobs': {}
+        }
+        for job in jobs:
+            job['batch'] = batch
+            job['state'] = 'queued'
+        self.remote_batches[batch['remote_id']] = batch
+        self.optimizer.submit(self._enqueue_remote_batch, batch)
+        return batch
+        
+    def _enqueue_remote_batch(self, batch):
+        """Write a batch to the work queue and start collecting its results (background thread)"""
+        payloads = [
+            {
+                'url': job['url'],
+                'id': job.get('id'),
+                'title': job['title'],
+                'duration': job.get('duration'),
+                'base_dir': os.path.dirname(job['library'].root),
+                'view_dir': job['view_dir'],
+                'view_name': job['view_name']
+            }
+            for job in batch['jobs']
+        ]
+        try:
+            queue_ids = batch['queue'].submit(batch['remote_id'], payloads)
+        except Exception as e:
+            self.root.after(0, self.log_message, f"❌ Work queue unavailable: {str(e)}", "error")
+            for job in batch['jobs']:
+                self._finish_remote_job(job, 'failed', {'error': f"work queue unavailable: {str(e)}"})
+            return
             
-            for i, song in enumerate(self.music_urls):
-                progress = i / total
-                self.root.after(0, lambda p=progress: self.progress_bar.set(p))
-                self.root.after(0, self.log_message, f"⬇️ Downloading {i+1}/{total}: {song['title']}", "info")
-                
-                # Update song status
-                song['status'] = 'downloading'
-                self.root.after(0, self.update_songs_list)
-                
-                cmd = [
-                    "yt-dlp",
-                    "--extract-audio",
-                    "--audio-format", "opus",
-                    "--output", os.path.join(download_dir, "%(title)s.%(ext)s"),
-                    "--no-playlist",
-                    "--no-warnings",
-                    song['url']
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    successful += 1
-                    song['status'] = 'completed'
-                    self.root.after(0, self.log_message, f"✅ Completed: {song['title']}", "success")
-                else:
-                    song['status'] = 'failed'
-                    self.root.after(0, self.log_message, f"❌ Failed: {song['title']}", "error")
-                    
-                self.root.after(0, self.update_songs_list)
+        batch['queue_jobs'] = dict(zip(queue_ids, batch['jobs']))
+        self.root.after(0, self.log_message, f"🌐 {len(queue_ids)} songs queued for remote workers", "info")
+        self.root.after(0, self._poll_work_queue)
+        
+    def _poll_work_queue(self):
+        """Collect remote results about once a second while queued batches are open"""
+        if self._work_queue_polling:
+            return
+        if not self.remote_batches:
+            return
+        self._work_queue_polling = True
+        self.optimizer.submit(self._collect_remote_results)
+        
+    def _collect_remote_results(self):
+        """Pass finished remote jobs through the normal completion path (background thread)"""
+        for batch in list(self.remote_batches.values()):
+            try:
+                results = batch['queue'].poll_results(batch['remote_id'])
+            except Exception as e:
+                self.root.after(0, self.log_message, f"⚠️ Work queue poll failed: {str(e)}", "warning")
+                break
+            for queue_id, state, result in results:
+                job = batch['queue_jobs'].get(queue_id)
+                if job is not None and job['state'] == 'queued':
+                    self._finish_remote_job(job, state, result)
                     
-            self.root.after(0, lambda: self.progress_bar.set(1.0))
-            self.root.after(0, self.log_message, f"🎉 Download complete! {successful}/{total} songs downloaded", "success")
-            self.root.after(0, self._download_complete)
+        def again():
+            self._work_queue_polling = False
+            self._poll_work_queue()
+        self.root.after(1000, again)
+        
+    def _finish_remote_job(self, job, state, result):
+        """Record the outcome a remote worker reported for a job (background thread)"""
+        ok = state == 'done'
+        if ok:
+            # The worker wrote the track into the shared library
+            job['track'] = job['library'].get_track(result.get('track_id') or job.get('id') or "")
+            job['file'] = result.get('file')
+            if job['track'] is None:
+                ok = False
+                job['error'] = f"{result.get('worker')} reported success but the song is not in this library"
+        else:
+            job['error'] = result.get('error')
+            job['stderr'] = result.get('stderr')
+        job['state'] = state
+        job['cancelled'] = state == 'cancelled'
+        job['started'] = True
+        
+        batch = job['batch']
+        batch['done'] += 1
+        batch['successful'] += ok
+        batch['cancelled'] += job['cancelled']
+        self._on_download_job_done(job, ok)
+        if batch['done'] == batch['total']:
+            self.remote_batches.pop(batch['remote_id'], None)
+            batch['on_finish'](batch)
             
+    def _cancel_remote_batch(self, batch):
+        """Cancel the unfinished jobs of a batch on the work queue (background thread)"""
+        try:
+            count = batch['queue'].cancel_batch(batch['remote_id'])
         except Exception as e:
-            self.root.after(0, self.log_message, f"❌ Download error: {str(e)}", "error")
-            self.root.after(0, self._download_complete)
+            self.root.after(0, self.log_message, f"⚠️ Could not cancel queued downloads: {str(e)}", "warning")
+            return
+        if count:
+            self.root.after(0, self.log_message, f"⛔ Cancelling {count} downloads on the work queue...", "warning")
             
+    def downloads_idle(self):
+        """True when neither this computer nor the work queue has unfinished downloads"""
+        return self.download_engine.is_idle() and not self.remote_batches
+        
+    def _start_download_job(self, job):
+        """Mark a job as started in the log and song list (worker thread)"""
+        job['started'] = True
+        total = job['batch']['total']
+        self.root.after(0, self.log_message, f"⬇️ Downloading {job['position']}/{total}: {job['title'][:40]}...", "info")
+        
+        if job.get('song'):
+            job['song']['status'] = 'downloading'
+            self.root.after(0, self.schedule_songs_list_update)
+            
+    def _run_download_job(self, job):
+        """Fetch one track into the library and link it into its folder view (worker thread)"""
+        self._start_download_job(job)
+        track = self.fetcher.fetch(job['library'], job['url'], job.get('id'), job)
+        return when_done(track, lambda track: bool(track) and self._link_download(job, track))
+        
+    def _run_download_jobs(self, jobs):
+        """Fetch a group of tracks through one yt-dlp process per library (worker thread)"""
+        for job in jobs:
+            self._start_download_job(job)
+            
+        outcomes = {}
+        libraries = {}
+        for job in jobs:
+            libraries.setdefault(job['library'].root, []).append(job)
+        for group in libraries.values():
+            for job, track in zip(group, self.fetcher.fetch_many(group[0]['library'], group)):
+                if isinstance(track, Exception) or not track:
+                    outcomes[id(job)] = track or False
+                    continue
+                try:
+                    outcomes[id(job)] = when_done(track, lambda track, job=job: self._link_download(job, track))
+                except Exception as e:
+                    outcomes[id(job)] = e
+        return [outcomes[id(job)] for job in jobs]
+        
+    def _link_download(self, job, track):
+        """Link a fetched track into the job's folder view (worker thread)"""
+        library = job['library']
+        if self.embed_art and not track.get('cover_art'):
+            # Start the art download now so it overlaps the rest of the batch
+            self.cover_art.fetch(cover_art_url(track))
+            
+        path = library.link_view(track['id'], job['view_dir'], job['view_name'] or track['title'])
+        job['track'] = track
+        job['file'] = os.path.basename(path)
+        return True
+        
+    def _on_download_job_done(self, job, ok):
+        """Report a finished job and advance the progress bar (worker thread)"""
+        self.progress.finish(job, ok)
+        self.root.after(0, self.update_session_bar)
+        
+        fields = {'job': job.get('id'), 'stage': "download"}
+        if ok:
+            title = job['track']['title'] if job.get('song') else job['title']
+            self.root.after(0, lambda: self.log_message(f"✅ Completed: {title[:30]}...", "success", **fields))
+        elif job.get('cancelled'):
+            # Queued jobs dropped by a bulk cancel are summed up at batch end
+            if job.get('started'):
+                self.root.after(0, lambda: self.log_message(f"⛔ Cancelled: {job['title'][:30]}...", "warning", **fields))
+        else:
+            self.root.after(0, lambda: self.log_message(
+                f"❌ Failed: {job['title'][:30]}...", "error", stderr=job.get('stderr'), **fields
+            ))
+            if job.get('error'):
+                self.root.after(0, lambda: self.log_message(f"❌ Download error: {job['error']}", "error", **fields))
+                
+        if job.get('song'):
+            job['song']['status'] = 'completed' if ok else ('cancelled' if job.get('cancelled') else 'failed')
+            self.root.after(0, self.schedule_songs_list_update)
+            
+    def _on_download_batch_finished(self, batch, label, album=None, playlist=None):
+        """Wrap up a batch once its last job finished (worker thread)"""
+        if self.downloads_idle():
+            self.root.after(0, lambda: self.progress_bar.set(1.0))
+        self._refresh_library_index()
+        tracks = [job['track'] for job in batch['jobs'] if job.get('track')]
+        if tracks and (self.write_tags or self.embed_art or self.normalize_loudness):
+            numbering = {job['track']['id']: job['position'] for job in batch['jobs'] if job.get('track')} if album else None
+            views = [
+                (job['track']['id'], os.path.join(job['view_dir'], job['file']))
+                for job in batch['jobs'] if job.get('track') and job.get('file')
+            ]
+            self.optimizer.submit(
+                self._post_process_tracks, batch['jobs'][0]['library'], tracks, album, numbering, playlist, views
+            )
+        self.root.after(0, self.log_message, f"🎉 {label}! {batch['successful']}/{batch['total']} songs", "success")
+        if batch['cancelled']:
+            self.root.after(0, self.log_message, f"⛔ {batch['cancelled']} songs cancelled", "warning")
+        self.root.after(0, self._download_complete)
+        
     def download_selected_songs(self):
         """Download selected playlist songs with modern feedback"""
-        included_songs = [item for item in self.playlist_items if item['included']]
+        model = self.playlist_model
+        included_songs = [model.entry(i) for i in model.selected_indices()]
         
         if not included_songs:
             self.log_message("⚠️ No songs selected for download", "warning")
             return
             
+        library = MusicLibrary(self.current_location)
+        if not self._preflight_space(library, [(song['id'], song.get('duration_seconds')) for song in included_songs]):
+            return
+            
+        if self.sync_mode_var.get():
+            match = PLAYLIST_ID_PATTERN.search(self.playlist_url or "")
+            if not match:
+                self.log_message("⚠️ Sync mode needs a playlist URL with a list id", "warning")
+                return
+                
+            excluded_ids = [model.ids[i] for i in range(len(model)) if not model.is_selected(i)]
+            self.log_message(f"🔁 Syncing {len(included_songs)} selected songs...", "info")
+            self.progress_info.configure(text="Syncing playlist...")
+            self.playlist_download_btn.configure(state="disabled", text="Syncing...")
+            
+            session = self.playlist_sessions[self.active_session_id]
+            threading.Thread(
+                target=self._sync_playlist_thread,
+                args=(match.group(1), self.playlist_url, included_songs, excluded_ids,
+                      self.sync_removed_var.get(), session['output_dir'], session['title']),
+                daemon=True
+            ).start()
+            return
+            
         self.log_message(f"🚀 Starting download of {len(included_songs)} selected songs...", "info")
         self.progress_info.configure(text="Downloading playlist...")
-        self.playlist_download_btn.configure(state="disabled", text="Downloading...")
         
-        threading.Thread(target=self._download_playlist_thread, args=(included_songs,), daemon=True).start()
+        session = self.playlist_sessions[self.active_session_id]
+        jobs = [
+            {
+                'library': library,
+                'url': song['url'],
+                'id': song['id'],
+                'title': song['title'],
+                'duration': song.get('duration_seconds'),
+                'position': i + 1,
+                'view_dir': session['output_dir'],
+                'view_name': f"{i+1:02d} - {song['title']}",
+                'group': session['id']
+            }
+            for i, song in enumerate(included_songs)
+        ]
+        session['batch'] = self._submit_download_jobs(
+            jobs,
+            lambda batch: self._on_download_batch_finished(batch, f"Playlist '{session['title']}' complete", album=session['title'], playlist=session['id'])
+        )
+        self.update_session_bar()
+        
+    def sync_all_playlists(self):
+        """Re-sync every playlist that has a stored snapshot"""
+        self.log_message("🔁 Syncing all saved playlists...", "info")
+        self.progress_info.configure(text="Syncing playlists...")
+        self.sync_all_btn.configure(state="disabled")
+        self.playlist_download_btn.configure(state="disabled", text="Syncing...")
+        
+        threading.Thread(target=self._sync_all_thread, args=(self.sync_removed_var.get(),), daemon=True).start()
+        
+    def _sync_playlist_thread(self, playlist_id, url, songs, excluded_ids, removed_mode, download_dir, title=None):
+        """Sync one playlist in background"""
+        try:
+            library = MusicLibrary(self.current_location)
+            summary = self._sync_playlist(
+                library, PlaylistSnapshots(library), playlist_id, url,
+                songs, excluded_ids, removed_mode, download_dir, title
+            )
+            self._refresh_library_index()
+            self.root.after(0, self.log_message, self._format_sync_summary(summary), "success")
+        except Exception as e:
+            self.root.after(0, self.log_message, f"❌ Sync error: {str(e)}", "error")
+        self.root.after(0, self._download_complete)
         
-    def _download_playlist_thread(self, songs):
-        """Download selected playlist songs with modern progress"""
+    def _sync_all_thread(self, removed_mode):
+        """Enumerate all saved playlists concurrently, then sync them one by one"""
         try:
-            download_dir = os.path.join(self.current_location, "YouTube_Music_Playlists")
-            os.makedirs(download_dir, exist_ok=True)
+            library = MusicLibrary(self.current_location)
+            self._watch_free_space(library)
+            snapshots = PlaylistSnapshots(library)
+            stored = [snapshot for snapshot in snapshots.list_all() if snapshot.get('url')]
             
-            total = len(songs)
-            successful = 0
+            # Enumeration is network bound and independent per playlist
+            futures = [self.optimizer.submit(self._fetch_playlist_entries, snapshot['url']) for snapshot in stored]
             
-            for i, song in enumerate(songs):
-                progress = i / total
-                self.root.after(0, lambda p=progress: self.progress_bar.set(p))
-                self.root.after(0, self.log_message, f"⬇️ Downloading {i+1}/{total}: {song['title'][:40]}...", "info")
+            for i, (snapshot, future) in enumerate(zip(stored, futures)):
+                self.root.after(0, lambda p=i / max(len(stored), 1): self.progress_bar.set(p))
+                try:
+                    title, model = future.result()
+                except Exception as e:
+                    self.root.after(0, self.log_message, f"❌ Could not load {snapshot['playlist_id']}: {str(e)[:80]}", "error")
+                    continue
+                    
+                excluded_ids = set(snapshot.get('excluded', []))
+                songs = [model.entry(i) for i in range(len(model)) if model.ids[i] not in excluded_ids]
+                summary = self._sync_playlist(
+                    library, snapshots, snapshot['playlist_id'], snapshot['url'],
+                    songs, sorted(excluded_ids), removed_mode, title=title
+                )
+                self.root.after(0, self.log_message, self._format_sync_summary(summary), "success")
                 
-                cmd = [
-                    "yt-dlp",
-                    "--extract-audio",
-                    "--audio-format", "opus",
-                    "--output", os.path.join(download_dir, f"{i+1:02d} - %(title)s.%(ext)s"),
-                    "--no-playlist",
-                    "--no-warnings",
-                    song['url']
-                ]
+            self._refresh_library_index()
+            self.root.after(0, self.log_message, f"🎉 Synced {len(stored)} playlists", "success")
+        except Exception as e:
+            self.root.after(0, self.log_message, f"❌ Sync error: {str(e)}", "error")
+        self.root.after(0, self._download_complete)
+        
+    def _sync_playlist(self, library, snapshots, playlist_id, url, songs, excluded_ids, removed_mode, download_dir=None, title=None):
+        """Apply the difference between the last snapshot and the current playlist"""
+        snapshot = snapshots.load(playlist_id)
+        previous_dir = snapshot.get('output_dir')
+        download_dir = (
+            download_dir or previous_dir
+            or os.path.join(self.current_location, "YouTube_Music_Playlists")
+        )
+        os.makedirs(download_dir, exist_ok=True)
+        if previous_dir and os.path.normcase(os.path.abspath(previous_dir)) != os.path.normcase(os.path.abspath(download_dir)):
+            self._move_playlist_view(snapshot, previous_dir, download_dir)
+        
+        new_entries = [
+            {
+                'id': song['id'],
+                'title': song['title'],
+                'url': song['url'],
+                'duration': song.get('duration_seconds'),
+                'position': i + 1
+            }
+            for i, song in enumerate(songs)
+        ]
+        changes = PlaylistSnapshots.diff(snapshot['entries'], new_entries)
+        to_fetch = list(changes['added'])
+        summary = {'playlist_id': playlist_id, 'added': 0, 'failed': 0, 'moved': 0, 'removed': 0}
+        
+        # Removed entries only lose their view file, the library copy stays
+        for entry in changes['removed']:
+            track = library.get_track(entry['id'])
+            if track and track.get('numbered_by') == playlist_id:
+                # Another playlist holding the song may number it from now on
+                del track['numbered_by']
+                library.save_track(track)
+            path = os.path.join(download_dir, entry['file'])
+            if removed_mode == "Keep removed" or not os.path.lexists(path):
+                continue
+            if removed_mode == "Archive removed":
+                archive_dir = os.path.join(download_dir, "_archive")
+                os.makedirs(archive_dir, exist_ok=True)
+                os.replace(path, os.path.join(archive_dir, entry['file']))
+            else:
+                os.remove(path)
+            summary['removed'] += 1
+            
+        for old, entry in changes['unchanged']:
+            if os.path.lexists(os.path.join(download_dir, old['file'])):
+                entry['file'] = old['file']
+            else:
+                to_fetch.append(entry)
                 
-                result = subprocess.run(cmd, capture_output=True, text=True)
+        # Renumber in two phases so swapped positions never collide
+        staged = []
+        for old, entry in changes['moved']:
+            path = os.path.join(download_dir, old['file'])
+            if os.path.lexists(path):
+                os.replace(path, path + ".renaming")
+                staged.append((path + ".renaming", entry))
+            else:
+                to_fetch.append(entry)
+        for temp_path, entry in staged:
+            entry['file'] = library.view_filename(f"{entry['position']:02d} - {entry['title']}")
+            os.replace(temp_path, os.path.join(download_dir, entry['file']))
+            summary['moved'] += 1
+            
+        jobs = [
+            {
+                'library': library,
+                'url': entry['url'],
+                'id': entry['id'],
+                'title': entry['title'],
+                'duration': entry.get('duration'),
+                'position': entry['position'],
+                'view_dir': download_dir,
+                'view_name': f"{entry['position']:02d} - {entry['title']}",
+                'group': playlist_id,
+                'entry': entry
+            }
+            for entry in to_fetch
+        ]
+        self.progress.add_jobs(jobs)
+        batch = self.download_engine.submit_batch(
+            jobs, self._run_download_job, on_job_done=self._on_download_job_done, run_many=self._run_download_jobs
+        )
+        # Only once the batch is queued, or the first tick could find the engine idle and stop
+        self.root.after(0, self.start_progress_tick)
+        batch['event'].wait()
+        
+        for job in jobs:
+            if job.get('file'):
+                job['entry']['file'] = job['file']
+                summary['added'] += 1
+            else:
+                summary['failed'] += 1
                 
-                if result.returncode == 0:
-                    successful += 1
-                    self.root.after(0, self.log_message, f"✅ Completed: {song['title'][:30]}...", "success")
-                else:
-                    self.root.after(0, self.log_message, f"❌ Failed: {song['title'][:30]}...", "error")
-                    
-            self.root.after(0, lambda: self.progress_bar.set(1.0))
-            self.root.after(0, self.log_message, f"🎉 Playlist download complete! {successful}/{total} songs", "success")
-            self.root.after(0, self._download_complete)
+        # Failed entries are left out so the next sync retries them
+        snapshot['url'] = url
+        snapshot['title'] = title or snapshot.get('title')
+        snapshot['output_dir'] = download_dir
+        snapshot['excluded'] = list(excluded_ids)
+        snapshot['entries'] = [entry for entry in new_entries if 'file' in entry]
+        snapshots.save(snapshot)
+        
+        if self.write_tags or self.embed_art or self.normalize_loudness:
+            # Renumbered songs get new track tags in place, and album gain
+            # covers the whole playlist, not just the songs fetched now
+            tracks = [library.get_track(entry['id']) for entry in snapshot['entries']]
+            numbering = {entry['id']: entry['position'] for entry in snapshot['entries']}
+            views = [(entry['id'], os.path.join(download_dir, entry['file'])) for entry in snapshot['entries']]
+            self._post_process_tracks(
+                library, [track for track in tracks if track],
+                snapshot.get('title') or playlist_id, numbering, playlist_id, views
+            )
+        return summary
+        
+    def _move_playlist_view(self, snapshot, old_dir, new_dir):
+        """Carry a synced playlist's view files over when its folder changed"""
+        moved = 0
+        for entry in snapshot['entries']:
+            source = os.path.join(old_dir, entry['file'])
+            target = os.path.join(new_dir, entry['file'])
+            if not os.path.lexists(source) or os.path.lexists(target):
+                continue
+            try:
+                shutil.move(source, target)
+                moved += 1
+            except OSError as e:
+                self.root.after(0, self.log_message, f"⚠️ Could not move {entry['file']}: {str(e)}", "warning")
+        if moved:
+            self.root.after(0, self.log_message, f"📁 Moved {moved} songs from {old_dir} to {new_dir}", "info")
             
-        except Exception as e:
-            self.root.after(0, self.log_message, f"❌ Download error: {str(e)}", "error")
-            self.root.after(0, self._download_complete)
+    def _post_process_tracks(self, library, tracks, album=None, numbering=None, playlist=None, views=()):
+        """Run the enabled tagging stages over a finished batch (background thread)
+        
+        album is the playlist title for playlist batches; numbering maps video ids
+        to their playlist position and playlist is the playlist id. views are the
+        (video id, path) folder view files of the batch.
+        """
+        owned = self._claim_numbering(library, tracks, playlist) if playlist else set()
+        if self.write_tags:
+            self._tag_metadata_batch(library, tracks, album, numbering or {}, owned)
+        if self.embed_art:
+            self._embed_cover_art_batch(library, tracks)
+        if self.normalize_loudness:
+            self._tag_loudness_batch(library, tracks, album is not None, owned)
+        self.loudness.save()
+        self._refresh_copied_views(library, views)
+        # Persist the index entries the stages above updated
+        self._refresh_library_index()
+        
+    def _refresh_copied_views(self, library, views):
+        """Bring views that link_view had to copy (no hardlink or symlink support) up to date with their tracks"""
+        refreshed = 0
+        for video_id, path in views:
+            try:
+                refreshed += library.refresh_view(video_id, path)
+            except OSError as e:
+                self.root.after(0, self.log_message, f"⚠️ Could not update {os.path.basename(path)}: {str(e)[:60]}", "warning")
+        if refreshed:
+            self.root.after(0, self.log_message, f"📋 Copied new tags into {refreshed} folder copies", "info")
+        
+    def _claim_numbering(self, library, tracks, playlist):
+        """Ids of the tracks whose playlist tags belong to this playlist, claiming unclaimed ones
+        
+        Hardlinked views share one file, so only one playlist may write its track
+        number, album and album gain into it; otherwise two playlists holding the
+        same song would rewrite it back and forth on every sync.
+        """
+        owned = set()
+        for track in {track['id']: track for track in tracks}.values():
+            owner = track.get('numbered_by')
+            if owner is None:
+                track['numbered_by'] = owner = playlist
+                library.save_track(track)
+            if owner == playlist:
+                owned.add(track['id'])
+        return owned
+            
+    def _tag_metadata_batch(self, library, tracks, album=None, numbering=None, owned=()):
+        """Write title, artist, album, track number and video id tags in-process (background thread)"""
+        numbering = numbering or {}
+        total = len(numbering) or None
+        written = unchanged = 0
+        for track in {track['id']: track for track in tracks}.values():
+            tags = {
+                'TITLE': track.get('title'),
+                'ARTIST': track.get('artist'),
+                'ALBUM': track.get('album'),
+                'YOUTUBE_VIDEO_ID': track['id']
+            }
+            if track['id'] in owned and track['id'] in numbering:
+                tags['ALBUM'] = track.get('album') or album
+                tags['TRACKNUMBER'] = numbering[track['id']]
+                tags['TRACKTOTAL'] = total
+            # Missing values leave the tag alone instead of deleting what another batch wrote
+            tags = {key: value for key, value in tags.items() if value not in (None, "")}
+            try:
+                changed = write_metadata_tags(track['path'], tags)
+                if changed:
+                    library.touched(track['id'])
+            except Exception as e:
+                self.root.after(0, self.log_message, f"⚠️ Could not tag {track['title'][:30]}: {str(e)[:60]}", "warning")
+                continue
+            if changed:
+                self.loudness.retarget(track['id'], track['path'])
+                written += 1
+            else:
+                unchanged += 1
+        self.root.after(0, self.log_message, f"🏷️ Tagged {written} songs ({unchanged} already up to date)", "success")
+            
+    def _embed_cover_art_batch(self, library, tracks):
+        """Embed cached cover art into every new track of a finished batch (background thread)"""
+        tracks = {track['id']: track for track in tracks if not track.get('cover_art')}
+        if not tracks:
+            return
+            
+        hits, fetched = self.cover_art.hits, self.cover_art.fetched
+        futures = {video_id: self.cover_art.fetch(cover_art_url(track), pin=True) for video_id, track in tracks.items()}
+        embedded = 0
+        for video_id, track in tracks.items():
+            try:
+                embed_cover_art(track['path'], futures[video_id].result())
+            except Exception as e:
+                self.root.after(0, self.log_message, f"⚠️ No cover art for {track['title'][:30]}: {str(e)[:60]}", "warning")
+                continue
+            finally:
+                self.cover_art.release(cover_art_url(track))
+            track['cover_art'] = True
+            library.save_track(track)
+            self.loudness.retarget(video_id, track['path'])
+            embedded += 1
+            
+        self.root.after(
+            0, self.log_message,
+            f"🖼️ Embedded cover art in {embedded}/{len(tracks)} songs "
+            f"({self.cover_art.fetched - fetched} downloaded, {self.cover_art.hits - hits} cached)",
+            "success"
+        )
+        
+    def _tag_loudness_batch(self, library, tracks, album=False, owned=()):
+        """Analyse loudness in parallel and write track (and album) gain tags (background thread)"""
+        tracks = list({track['id']: track for track in tracks}.values())
+        results, cached, errors = self.loudness.analyse(tracks)
+        for video_id, error in errors:
+            self.root.after(0, self.log_message, f"⚠️ Loudness analysis failed for {video_id}: {str(error)[:60]}", "warning")
+            
+        album_result = album_loudness(list(results.values())) if album else None
+        tagged = 0
+        for track in tracks:
+            result = results.get(track['id'])
+            if result is None:
+                continue
+            # Only the playlist that owns a shared file writes its album gain
+            track_album = album_result if track['id'] in owned else None
+            gains = {
+                'track_lufs': round(result['lufs'], 2),
+                'album_lufs': round(track_album['lufs'], 2) if track_album else (track.get('loudness') or {}).get('album_lufs')
+            }
+            if track.get('loudness') == gains:
+                continue
+            try:
+                write_gain_tags(track['path'], result, track_album)
+            except Exception as e:
+                self.root.after(0, self.log_message, f"⚠️ Could not tag {track['title'][:30]}: {str(e)[:60]}", "warning")
+                continue
+            # Tagging changes the file, keep the cached result pointing at it
+            self.loudness.remember(track['id'], track['path'], result)
+            track['loudness'] = gains
+            library.save_track(track)
+            tagged += 1
+        
+        message = f"🔊 Loudness: {len(results)} analysed ({cached} cached), {tagged} tagged"
+        if album_result:
+            message += f", album {album_result['lufs']:.1f} LUFS"
+        self.root.after(0, self.log_message, message, "success")
+        
+    def _format_sync_summary(self, summary):
+        """One line description of a playlist sync"""
+        return (
+            f"🔁 {summary['playlist_id']}: {summary['added']} new, {summary['moved']} renumbered, "
+            f"{summary['removed']} removed, {summary['failed']} failed"
+        )
+        
+    def start_progress_updates(self, jobs):
+        """Weigh new jobs into the progress bar and keep the display ticking"""
+        self.progress.add_jobs(jobs)
+        self.start_progress_tick()
+        
+    def start_progress_tick(self):
+        """Keep the progress display ticking until downloads go idle (main thread)"""
+        if not self._progress_ticking:
+            self._progress_ticking = True
+            self.root.after(0, self._progress_tick)
             
+    def _progress_tick(self):
+        """Refresh the progress bar, throughput and ETA while downloads run"""
+        if self.downloads_idle():
+            self._progress_ticking = False
+            return
+            
+        fraction, rate, eta = self.progress.snapshot()
+        self.progress_bar.set(fraction)
+        if self.download_engine.waiting_for_space:
+            text = "Waiting for disk space..."
+        elif self.download_engine.paused:
+            text = f"Paused at {fraction * 100:.0f}%"
+        else:
+            text = f"{fraction * 100:.0f}%"
+            if rate:
+                text += f" • {format_size(rate)}/s"
+            if eta is not None:
+                text += f" • ETA {self.format_duration(str(int(eta)))}"
+        self.progress_info.configure(text=text)
+        self.root.after(500, self._progress_tick)
+        
     def _download_complete(self):
         """Handle download completion with modern UI updates"""
-        self.progress_info.configure(text="Ready")
-        self.progress_bar.set(0)
-        self.multi_download_btn.configure(state="normal", text="🚀 Download All Songs")
-        self.playlist_download_btn.configure(state="normal", text="🚀 Download Selected Songs")
+        if self.downloads_idle():
+            self.progress.reset()
+            self.progress_info.configure(text="Ready")
+            self.progress_bar.set(0)
+        if self.multi_batch is None or self.multi_batch['done'] == self.multi_batch['total']:
+            self.multi_download_btn.configure(state="normal", text="🚀 Download All Songs")
+        self.sync_all_btn.configure(state="normal")
+        self.update_session_bar()
+        self.update_playlist_counter()
+        
+    def _refresh_library_index(self):
+        """Bring the library index up to date; call from a background thread"""
+        library = MusicLibrary(self.current_location)
+        if self.library_index is None or self.library_index.library.root != library.root:
+            self.library_index = LibraryIndex(library)
+        try:
+            self.library_index.refresh()
+        except OSError as e:
+            self.root.after(0, self.log_message, f"⚠️ Library index refresh failed: {str(e)}", "warning")
+        return self.library_index
         
     def clear_log(self):
         """Clear the log with modern feedback"""
@@ -1581,8 +6007,10 @@ class ModernDownloader:
         self.log_text.configure(state="disabled")
         self.log_message("🗑️ Log cleared", "info")
         
-    def log_message(self, message, level="info"):
+    def log_message(self, message, level="info", job=None, stage=None, stderr=None):
         """Modern logging with enhanced formatting and emojis"""
+        # Written to disk by a background thread, so this stays cheap
+        self.log_writer.write(level, message, job, stage, stderr)
         self.log_text.configure(state="normal")
         
         colors = {
@@ -1664,21 +6092,71 @@ class ModernDownloader:
             self.log_message(f"⚠️ Missing dependencies: {', '.join(missing)}", "warning")
             self.log_message("📥 Install missing dependencies to enable downloads", "info")
             
+    def toggle_pause(self):
+        """Pause or resume the download engine"""
+        if self.download_engine.paused:
+            self.download_engine.resume()
+            self.pause_btn.configure(text="⏸ Pause")
+            self.log_message("▶️ Downloads resumed", "info")
+        else:
+            self.download_engine.pause()
+            self.pause_btn.configure(text="▶ Resume")
+            self.log_message("⏸️ Downloads paused", "warning")
+            
+    def cancel_all_downloads(self):
+        """Cancel every queued and running download"""
+        count = self.download_engine.cancel_all()
+        if count:
+            self.log_message(f"⛔ Cancelling {count} downloads...", "warning")
+        for batch in list(self.remote_batches.values()):
+            self.optimizer.submit(self._cancel_remote_batch, batch)
+        if self.download_engine.paused:
+            self.toggle_pause()
+            
     def on_closing(self):
         """Handle application closing with cleanup"""
+        # Kill yt-dlp/ffmpeg children instead of leaving them orphaned
+        self.download_engine.shutdown()
+        self.cover_art.shutdown()
+        if self.thumbnails:
+            self.thumbnails.shutdown()
+        self.loudness.shutdown()
+        self.fetcher.verifier.shutdown()
         self.optimizer.shutdown(wait=False)
+        self.log_writer.close()
+        if self.stall_monitor:
+            self.stall_monitor.stop()
+            path = self.stall_monitor.dump(os.path.join(APP_DATA_DIR, "diagnostics"))
+            print(f"🩺 Diagnostics report written to {path}")
         self.root.destroy()
         
     def run(self):
         """Start the modern application"""
         self.log_message("🚀 Modern YouTube Music Downloader started!", "success")
+        if self.config.get('work_queue'):
+            self.set_work_queue(self.config['work_queue'])
+        if 'calibration' not in self.config:
+            self.log_message("⚡ Press Auto-tune to pick worker counts for this machine", "info")
         self.root.mainloop()
 
 def main():
     """Main function with modern error handling"""
-    try:
-        import customtkinter
-    except ImportError:
+    parser = argparse.ArgumentParser(description="YouTube Music Downloader")
+    parser.add_argument("--diagnostics", action="store_true", help="record UI stalls and write a report on exit")
+    parser.add_argument("--profile", action="store_true", help="also profile UI hot paths (implies --diagnostics)")
+    parser.add_argument("--worker", action="store_true", help="run headless, downloading jobs from a shared work queue")
+    parser.add_argument("--queue", help="work queue for --worker: an SQLite file path, or backend:location")
+    parser.add_argument("--workers", type=int, help="parallel downloads for --worker")
+    parser.add_argument("--library", help="where this computer mounts the shared download location, for --worker")
+    args = parser.parse_args()
+    
+    if args.worker:
+        if not args.queue:
+            parser.error("--worker needs --queue")
+        QueueWorker(open_work_queue(args.queue), args.workers, args.library).run()
+        return
+        
+    if ctk is None:
         print("❌ CustomTkinter is required!")
         print("📥 Installing CustomTkinter...")
         try:
@@ -1690,12 +6168,14 @@ def main():
             print("Please install manually: pip install customtkinter")
             return
     
+    # Set appearance mode
+    ctk.set_appearance_mode("dark")
+    
     try:
-        app = ModernDownloader()
+        app = ModernDownloader(diagnostics=args.diagnostics, profile=args.profile)
         app.run()
     except Exception as e:
         print(f"❌ Application error: {e}")
-        import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
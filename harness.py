@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+YouTube Music Downloader - Fault injection harness
+Runs the real download engine and fetcher against a local media origin that
+injects latency, bandwidth caps, disconnects and error responses, through a
+stub yt-dlp that downloads from it. POSIX only (the stub is a shebang script).
+
+    python harness.py              run every scenario
+    python harness.py flaky dead   run some of them
+    python harness.py --list       show the scenarios
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from final import (
+    DownloadEngine, TrackFetcher, TrackVerifier, StagingCopier, InfoJsonCache, MusicLibrary,
+    HardwareCalibrator, canonical_song_url
+)
+
+SONG_SECONDS = 30
+CHUNK_SIZE = 16 * 1024
+
+class FaultPlan:
+    """Faults the origin injects; failures are (kind, every, attempts) tuples
+    
+    kind is an HTTP status or "disconnect". Songs whose index is a multiple of
+    every get that fault on their first attempts requests. bandwidth caps every
+    connection, link_bandwidth all of them together.
+    """
+    
+    def __init__(self, latency=0.0, first_byte_delay=0.0, bandwidth=None, failures=(), link_bandwidth=None):
+        self.latency = latency
+        self.first_byte_delay = first_byte_delay
+        self.bandwidth = bandwidth
+        self.failures = failures
+        self.link_bandwidth = link_bandwidth
+    
+    def fault_for(self, index, attempt):
+        """Fault for a song's attempt (1-based), or None"""
+        for kind, every, attempts in self.failures:
+            if index % every == 0 and attempt <= attempts:
+                return kind
+        return None
+
+def synthetic_audio(seconds):
+    """A real opus file of a sine tone when FFmpeg can make one, else random bytes; returns (data, real)"""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+             "-c:a", "libopus", "-b:a", "96k", "-f", "opus", "-"],
+            capture_output=True, timeout=60
+        )
+        if result.returncode == 0 and result.stdout:
+            return result.stdout, True
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        pass
+    return os.urandom(seconds * 12000), False
+
+class MediaOrigin:
+    """Local HTTP server for /media/<id>.opus that misbehaves as its FaultPlan says"""
+    
+    def __init__(self, plan, seconds=SONG_SECONDS):
+        self.plan = plan
+        self.seconds = seconds
+        self.audio, self.real_audio = synthetic_audio(seconds)
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.link_free_at = 0.0
+        origin = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                origin.handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+    
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def handle(self, request):
+        name = os.path.basename(request.path)
+        video_id = name.rsplit(".", 1)[0]
+        if not request.path.startswith("/media/") or not video_id[2:].isdigit():
+            request.send_error(404)
+            return
+        with self.lock:
+            self.requests[video_id] += 1
+            attempt = self.requests[video_id]
+        
+        time.sleep(self.plan.latency)
+        fault = self.plan.fault_for(int(video_id[2:]), attempt)
+        if isinstance(fault, int):
+            request.send_response(fault)
+            if fault == 429:
+                request.send_header("Retry-After", "1")
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        
+        time.sleep(self.plan.first_byte_delay)
+        request.send_response(200)
+        request.send_header("Content-Type", "audio/ogg")
+        request.send_header("Content-Length", str(len(self.audio)))
+        request.end_headers()
+        # Disconnects cut the body short; the client sees an incomplete read
+        end = len(self.audio) * 2 // 5 if fault == "disconnect" else len(self.audio)
+        try:
+            for offset in range(0, end, CHUNK_SIZE):
+                chunk = self.audio[offset:min(offset + CHUNK_SIZE, end)]
+                request.wfile.write(chunk)
+                with self.lock:
+                    self.bytes_sent += len(chunk)
+                delay = len(chunk) / self.plan.bandwidth if self.plan.bandwidth else 0.0
+                if self.plan.link_bandwidth:
+                    # Connections queue for the shared link one chunk at a time
+                    with self.lock:
+                        self.link_free_at = max(self.link_free_at, time.monotonic()) + len(chunk) / self.plan.link_bandwidth
+                        delay = max(delay, self.link_free_at - time.monotonic())
+                if delay > 0:
+                    time.sleep(delay)
+        except OSError:
+            pass
+        request.close_connection = True
+
+# Understands the arguments TrackFetcher passes and downloads every song from the
+# origin, retrying errors with backoff as often as --retries says (yt-dlp's default
+# of 10 when it is not given)
+STUB_EXTRACTOR = r'''#!{python}
+import http.client, json, os, re, sys, time, urllib.error, urllib.request
+args = sys.argv[1:]
+def option(name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+RETRIES = int(option("--retries", "10"))
+origin = os.environ["HARNESS_ORIGIN"]
+template = option("--output")
+progress = option("--progress-template", "download:").split(":", 1)[1]
+if "--batch-file" in args:
+    with open(option("--batch-file")) as f:
+        urls = f.read().split()
+elif "--load-info-json" in args:
+    with open(option("--load-info-json")) as f:
+        urls = [json.load(f)["webpage_url"]]
+else:
+    urls = [args[-1]]
+
+def download(video_id):
+    last = None
+    for attempt in range(RETRIES + 1):
+        try:
+            with urllib.request.urlopen(f"{{origin}}/media/{{video_id}}.opus", timeout=15) as response:
+                total = int(response.headers["Content-Length"])
+                data = bytearray()
+                while True:
+                    chunk = response.read(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                    print(progress.replace("%(info.id)s", video_id)
+                          .replace("%(progress.downloaded_bytes)s", str(len(data)))
+                          .replace("%(progress.total_bytes)s", str(total))
+                          .replace("%(progress.total_bytes_estimate)s", "NA"), flush=True)
+                if len(data) < total:
+                    raise http.client.IncompleteRead(bytes(data), total - len(data))
+                return bytes(data)
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            last = e
+            time.sleep(0.2 * 2 ** attempt)
+    raise last
+
+failed = 0
+for url in urls:
+    video_id = re.search(r"v=([A-Za-z0-9_-]{{11}})", url).group(1)
+    try:
+        data = download(video_id)
+    except Exception as e:
+        print(f"ERROR: [harness] {{video_id}}: {{e}}", file=sys.stderr, flush=True)
+        failed += 1
+        continue
+    path = template.replace("%(id)s", video_id).replace("%(ext)s", "opus")
+    with open(path, "wb") as f:
+        f.write(data)
+    print(json.dumps({{"id": video_id, "title": f"Harness song {{video_id}}", "duration": {seconds},
+                      "ext": "opus", "uploader": "harness"}}), flush=True)
+sys.exit(1 if failed else 0)
+'''
+
+def install_stub_extractor(directory, seconds=SONG_SECONDS):
+    """Write the stub yt-dlp into a bin folder and return the folder"""
+    bin_dir = os.path.join(directory, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, "yt-dlp")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(STUB_EXTRACTOR.format(python=sys.executable, seconds=seconds))
+    os.chmod(path, 0o755)
+    return bin_dir
+
+def multiples(songs, *every, unless=None):
+    """How many song indices up to songs are a multiple of any of every (and not of unless)"""
+    return sum(
+        1 for index in range(1, songs + 1)
+        if any(index % n == 0 for n in every) and not (unless and index % unless == 0)
+    )
+
+# Expectations are functions of the song count and workers, so --songs and --workers
+# change them too. Faults lasting at most FETCH_RETRIES + 1 requests are ridden out
+# inside one yt-dlp run; longer ones need the engine to queue the song again (up to
+# DownloadEngine.MAX_RETRIES times), and one lasting 1000 requests is never recovered
+RUN_REQUESTS = TrackFetcher.FETCH_RETRIES + 1
+SCENARIOS = {
+    "baseline": {
+        'faults': FaultPlan(),
+        'expect': lambda songs, workers: {'failed': 0, 'max_recovered': 0, 'max_requeued': 0}
+    },
+    "latency": {
+        'faults': FaultPlan(latency=0.2, first_byte_delay=0.5),
+        'expect': lambda songs, workers: {'failed': 0}
+    },
+    "bandwidth": {
+        'faults': FaultPlan(bandwidth=256 * 1024),
+        # Every running download is capped at 256 KB/s; process start-up and
+        # verification keep it from reaching the cap
+        'expect': lambda songs, workers: {
+            'failed': 0,
+            'max_throughput': min(songs, workers) * 256 * 1024 * 1.2,
+            'min_throughput': min(songs, workers) * 256 * 1024 * 0.3
+        }
+    },
+    "flaky": {
+        'faults': FaultPlan(failures=((429, 3, 1), (503, 4, 2), (500, 5, 1))),
+        'expect': lambda songs, workers: {
+            'failed': 0, 'min_recovered': multiples(songs, 3, 4, 5), 'max_requeued': 0
+        }
+    },
+    "disconnects": {
+        'faults': FaultPlan(failures=(("disconnect", 2, 1),)),
+        'expect': lambda songs, workers: {'failed': 0, 'min_recovered': multiples(songs, 2), 'max_requeued': 0}
+    },
+    "outage": {
+        # Outlasts one yt-dlp run's retries, so only the engine's requeue recovers it
+        'faults': FaultPlan(failures=((503, 3, RUN_REQUESTS + 1),)),
+        'expect': lambda songs, workers: {'failed': 0, 'min_requeued': multiples(songs, 3)}
+    },
+    "dead": {
+        'faults': FaultPlan(failures=((500, 5, 1000),)),
+        'expect': lambda songs, workers: {'failed': songs // 5}
+    },
+    "calibration": {
+        # Auto-tune's network probe against the origin: one stream gets 256 KB/s,
+        # the link carries 512 KB/s, so parallel streams only double the speed
+        'faults': FaultPlan(bandwidth=256 * 1024, link_bandwidth=512 * 1024),
+        'calibrate': True,
+        'expect': lambda songs, workers: {
+            'stream_mbps': (256 * 1024 * 8 / 1e6 * 0.7, 256 * 1024 * 8 / 1e6 * 1.2),
+            'network_mbps': (512 * 1024 * 8 / 1e6 * 0.7, 512 * 1024 * 8 / 1e6 * 1.2),
+            # A gain of two stays at the default instead of dropping below it
+            'download_workers': HardwareCalibrator.DEFAULT_DOWNLOAD_WORKERS
+        }
+    },
+    "grouped": {
+        'faults': FaultPlan(latency=0.05, failures=((429, 3, 1), ("disconnect", 4, 1), (503, 7, 1000))),
+        'group_size': 4,
+        'expect': lambda songs, workers: {
+            'failed': songs // 7,
+            'min_recovered': multiples(songs, 3, 4, unless=7),
+            'max_requeued': 0
+        }
+    },
+}
+
+def run_calibration(name, scenario, duration=2.0):
+    """Run HardwareCalibrator's network probe against the origin; returns (stats, problems)"""
+    work = tempfile.mkdtemp(prefix=f"harness-{name}-")
+    try:
+        with MediaOrigin(scenario['faults']) as origin:
+            calibrator = HardwareCalibrator(work, f"{origin.url}/media/hs000000001.opus")
+            started = time.monotonic()
+            measured = calibrator.measure_network(duration)
+            elapsed = time.monotonic() - started
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    # As on an eight-core machine, so the result does not depend on this one
+    stats = dict(measured, seconds=round(elapsed, 2), **HardwareCalibrator.recommend(dict(measured, cores=8)))
+    
+    problems = []
+    expect = scenario['expect'](0, 0)
+    for key in ('stream_mbps', 'network_mbps'):
+        low, high = expect[key]
+        if not low <= stats[key] <= high:
+            problems.append(f"{key} {stats[key]}, expected {low:.1f} to {high:.1f}")
+    if stats['download_workers'] != expect['download_workers']:
+        problems.append(f"{stats['download_workers']} parallel downloads recommended, expected {expect['download_workers']}")
+    return stats, problems
+
+def run_scenario(name, scenario, songs=12, workers=4, timeout=300):
+    """Download songs through the real engine against a misbehaving origin; returns (stats, problems)"""
+    if scenario.get('calibrate'):
+        return run_calibration(name, scenario)
+    work = tempfile.mkdtemp(prefix=f"harness-{name}-")
+    saved_env = {key: os.environ.get(key) for key in ("PATH", "HARNESS_ORIGIN")}
+    try:
+        with MediaOrigin(scenario['faults']) as origin:
+            os.environ["PATH"] = install_stub_extractor(work, origin.seconds) + os.pathsep + os.environ.get("PATH", "")
+            os.environ["HARNESS_ORIGIN"] = origin.url
+            
+            engine = DownloadEngine(workers=scenario.get('workers', workers))
+            engine.set_group_size(scenario.get('group_size', 1))
+            verifier = TrackVerifier(2)
+            # Random bytes would never pass the FFmpeg checks
+            verifier.available = origin.real_audio
+            fetcher = TrackFetcher(
+                engine, InfoJsonCache(os.path.join(work, "info")), StagingCopier(1), verifier,
+                log=lambda message, level="info", **fields: None
+            )
+            library = MusicLibrary(work)
+            
+            def run(job):
+                # A Future while the staged file is verified; the engine settles the job later
+                return fetcher.fetch(library, job['url'], job['id'], job)
+            
+            def run_many(jobs):
+                return fetcher.fetch_many(library, jobs)
+            
+            jobs = [
+                {'url': canonical_song_url(f"hs{index:09d}"), 'id': f"hs{index:09d}", 'title': f"song {index}",
+                 'duration': origin.seconds}
+                for index in range(1, songs + 1)
+            ]
+            started = time.monotonic()
+            batch = engine.submit_batch(jobs, run, run_many=run_many)
+            finished = batch['event'].wait(timeout)
+            elapsed = time.monotonic() - started
+            engine.shutdown()
+            verifier.shutdown()
+            
+            ok = [job for job in jobs if job.get('state') == 'done' and library.get_track(job['id'])]
+            stored = sum(os.path.getsize(library.track_path(job['id'])) for job in ok)
+            stats = {
+                'songs': len(jobs),
+                'ok': len(ok),
+                'failed': len(jobs) - len(ok),
+                # Songs that hit a fault and still succeeded, inside yt-dlp or by being queued again
+                'recovered': sum(1 for job in ok if origin.requests[job['id']] > 1),
+                'requeued': sum(1 for job in ok if job.get('attempts', 0) > 0),
+                'requests': sum(origin.requests.values()),
+                'seconds': round(elapsed, 2),
+                'throughput': stored / elapsed if elapsed else 0.0,
+                'verified': origin.real_audio
+            }
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(work, ignore_errors=True)
+    
+    problems = [] if finished else [f"did not finish within {timeout}s"]
+    expect = scenario['expect'](songs, scenario.get('workers', workers))
+    if 'failed' in expect and stats['failed'] != expect['failed']:
+        problems.append(f"{stats['failed']} failed, expected {expect['failed']}")
+    if stats['recovered'] < expect.get('min_recovered', 0):
+        problems.append(f"{stats['recovered']} recovered, expected at least {expect['min_recovered']}")
+    if stats['recovered'] > expect.get('max_recovered', stats['recovered']):
+        problems.append(f"{stats['recovered']} recovered, expected at most {expect['max_recovered']}")
+    if stats['requeued'] < expect.get('min_requeued', 0):
+        problems.append(f"{stats['requeued']} recovered by requeueing, expected at least {expect['min_requeued']}")
+    if stats['requeued'] > expect.get('max_requeued', stats['requeued']):
+        problems.append(f"{stats['requeued']} recovered by requeueing, expected at most {expect['max_requeued']}")
+    if stats['throughput'] > expect.get('max_throughput', stats['throughput']):
+        problems.append(f"throughput {stats['throughput'] / 1024:.0f} KB/s above the {expect['max_throughput'] / 1024:.0f} KB/s cap")
+    if stats['throughput'] < expect.get('min_throughput', 0):
+        problems.append(f"throughput {stats['throughput'] / 1024:.0f} KB/s below {expect['min_throughput'] / 1024:.0f} KB/s")
+    return stats, problems
+
+def main():
+    """Run the selected scenarios and exit non-zero if any expectation failed"""
+    parser = argparse.ArgumentParser(description="Fault injection harness for the download engine")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--songs", type=int, default=12, help="songs per scenario")
+    parser.add_argument("--workers", type=int, default=4, help="parallel downloads")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    
+    if args.list:
+        for name, scenario in SCENARIOS.items():
+            expect = scenario['expect'](args.songs, scenario.get('workers', args.workers))
+            print(f"{name}: expects {json.dumps(expect)}")
+        return 0
+    
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    
+    results = {}
+    failures = 0
+    for name in args.scenarios or list(SCENARIOS):
+        stats, problems = run_scenario(name, SCENARIOS[name], args.songs, args.workers)
+        results[name] = dict(stats, problems=problems)
+        failures += bool(problems)
+        if not args.json and SCENARIOS[name].get('calibrate'):
+            print(
+                f"{'❌' if problems else '✅'} {name}: {stats['stream_mbps']} Mbit/s per stream, "
+                f"{stats['network_mbps']} Mbit/s over {stats['network_streams']} streams, "
+                f"{stats['download_workers']} parallel downloads recommended, {stats['seconds']}s"
+            )
+        elif not args.json:
+            status = "❌" if problems else "✅"
+            print(
+                f"{status} {name}: {stats['ok']}/{stats['songs']} ok, {stats['recovered']} recovered "
+                f"({stats['requeued']} requeued), "
+                f"{stats['failed']} failed, {stats['requests']} requests, {stats['seconds']}s, "
+                f"{stats['throughput'] / 1024:.0f} KB/s" + ("" if stats['verified'] else " (unverified)")
+            )
+            for problem in problems:
+                print(f"   {problem}")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())